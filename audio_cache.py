@@ -0,0 +1,161 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import streamlit as st
+from settings import get_settings, on_reload
+
+# Files used this recently are never evicted, so a transcription that is
+# reading a cached file cannot lose it to another job's eviction
+PIN_SECONDS = 10 * 60
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class AudioCache:
+    """Content-addressed store of transcoded audio, keyed by video ID and encoding profile
+
+    Files live under objects/ named by their SHA-256, so identical outputs are
+    stored once. Once the total size passes `quota_bytes`, the least recently
+    used files are evicted.
+    """
+
+    def __init__(self, cache_dir, quota_bytes):
+        self.cache_dir = cache_dir
+        self.quota_bytes = quota_bytes
+        self.db_path = os.path.join(cache_dir, 'index.db')
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS entries (
+                    video_id TEXT NOT NULL,
+                    profile TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (video_id, profile)
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries(digest);
+                CREATE INDEX IF NOT EXISTS idx_objects_last_used ON objects(last_used);
+            """)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _object_path(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], f"{digest}.ogg")
+
+    def get(self, video_id, profile):
+        """Path of the cached audio for a video and profile, or None"""
+        with self.lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT digest FROM entries WHERE video_id = ? AND profile = ?", (video_id, profile)
+            ).fetchone()
+            if row is None:
+                return None
+            path = self._object_path(row[0])
+            if not os.path.exists(path):
+                # Removed behind our back; forget it
+                self._remove_object(conn, row[0])
+                return None
+            conn.execute("UPDATE objects SET last_used = ? WHERE digest = ?", (time.time(), row[0]))
+        return path
+
+    def put(self, video_id, profile, path):
+        """Move a transcoded file into the cache and return its cached path"""
+        digest = file_digest(path)
+        size = os.path.getsize(path)
+        target = self._object_path(digest)
+        with self.lock:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                os.remove(path)
+            else:
+                # Move then rename, so a partial file is never visible under its digest
+                tmp_path = f"{target}.tmp"
+                shutil.move(path, tmp_path)
+                os.replace(tmp_path, target)
+            with self._connect() as conn:
+                previous = conn.execute(
+                    "SELECT digest FROM entries WHERE video_id = ? AND profile = ?", (video_id, profile)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO objects VALUES (?, ?, ?)", (digest, size, time.time())
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    (video_id, profile, digest, time.strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                if previous and previous[0] != digest:
+                    self._remove_if_unused(conn, previous[0])
+                self._evict(conn)
+        return target
+
+    def _remove_object(self, conn, digest):
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+        conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+        conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+
+    def _remove_if_unused(self, conn, digest):
+        if conn.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+            self._remove_object(conn, digest)
+
+    def _evict(self, conn):
+        """Remove least recently used files until the cache fits its quota"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.quota_bytes:
+            return
+        rows = conn.execute(
+            "SELECT digest, size FROM objects WHERE last_used < ? ORDER BY last_used",
+            (time.time() - PIN_SECONDS,)
+        ).fetchall()
+        for digest, size in rows:
+            if total <= self.quota_bytes:
+                break
+            self._remove_object(conn, digest)
+            total -= size
+
+    def profiles(self, video_id):
+        """Encoding profiles cached for a video"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT profile FROM entries WHERE video_id = ? ORDER BY profile", (video_id,)
+            )]
+
+    def stats(self):
+        with self._connect() as conn:
+            files, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {'files': files, 'entries': entries, 'bytes': size, 'quota_bytes': self.quota_bytes}
+
+@st.cache_resource
+def get_audio_cache():
+    """Process-wide transcoded audio cache"""
+    settings = get_settings()
+    return AudioCache(settings['audio_cache_dir'], int(float(settings['audio_cache_quota_mb']) * 1024 * 1024))
+
+on_reload(get_audio_cache.clear)
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+import subprocess
+import threading
+import time
+import numpy as np
+import streamlit as st
+from settings import get_settings, on_reload
+
+
+# Spectral-peak ("constellation") fingerprint parameters. Audio is decoded to
+# 8 kHz mono, so each STFT frame covers 128 ms and bins are ~7.8 Hz wide.
+SAMPLE_RATE = 8000
+FRAME_SIZE = 1024
+HOP_SIZE = 1024
+PEAKS_PER_FRAME = 3
+FAN_OUT = 3
+MAX_DELTA_FRAMES = 63
+QUERY_HASHES = 5000
+
+# A match needs this fraction of the sampled query hashes to line up at one
+# time offset against a stored track, and at least MIN_ALIGNED_HASHES of them.
+MATCH_THRESHOLD = 0.25
+MIN_ALIGNED_HASHES = 50
+
+# The stored track and the query must have about the same number of hashes,
+# so a clip is never given the transcript of the longer recording it came from
+HASH_COUNT_TOLERANCE = 0.1
+MATCH_CANDIDATES = 20
+
+def decode_pcm(path, ffmpeg_cmd='ffmpeg'):
+    """Decode an audio file into mono float PCM at SAMPLE_RATE"""
+    result = subprocess.run([
+        ffmpeg_cmd, '-v', 'error', '-i', path,
+        '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE),
+        '-f', 's16le', '-'
+    ], check=True, capture_output=True)
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+def spectral_peaks(samples):
+    """Return (frame, bin) pairs of the strongest spectral peaks per frame"""
+    if len(samples) < FRAME_SIZE:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    n_frames = 1 + (len(samples) - FRAME_SIZE) // HOP_SIZE
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE][:n_frames]
+    spectrum = np.log1p(np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE), axis=1)))
+
+    # Keep bins that are local maxima along frequency and above the frame mean,
+    # then take the strongest few per frame
+    local_max = np.zeros_like(spectrum, dtype=bool)
+    local_max[:, 1:-1] = (spectrum[:, 1:-1] > spectrum[:, :-2]) & (spectrum[:, 1:-1] >= spectrum[:, 2:])
+    local_max &= spectrum > spectrum.mean(axis=1, keepdims=True)
+    scores = np.where(local_max, spectrum, -np.inf)
+    top_bins = np.argpartition(scores, -PEAKS_PER_FRAME, axis=1)[:, -PEAKS_PER_FRAME:]
+    top_scores = np.take_along_axis(scores, top_bins, axis=1)
+
+    frame_idx = np.repeat(np.arange(n_frames), PEAKS_PER_FRAME)
+    bins = top_bins.ravel()
+    keep = np.isfinite(top_scores.ravel())
+    return frame_idx[keep], bins[keep]
+
+def fingerprint_samples(samples):
+    """Hash pairs of nearby spectral peaks into (hash, frame offset) arrays"""
+    frame_idx, bins = spectral_peaks(samples)
+    order = np.lexsort((bins, frame_idx))
+    frame_idx, bins = frame_idx[order], bins[order]
+
+    hashes, offsets = [], []
+    for step in range(1, FAN_OUT * PEAKS_PER_FRAME + 1):
+        anchor_t, target_t = frame_idx[:-step], frame_idx[step:]
+        anchor_f, target_f = bins[:-step], bins[step:]
+        delta = target_t - anchor_t
+        valid = (delta > 0) & (delta <= MAX_DELTA_FRAMES)
+        # 9 bits per frequency bin (FRAME_SIZE // 2 + 1 bins) and 6 bits of delta
+        hashes.append((anchor_f[valid] << 15) | (target_f[valid] << 6) | delta[valid])
+        offsets.append(anchor_t[valid])
+    if not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(hashes).astype(np.int64), np.concatenate(offsets).astype(np.int64)
+
+def fingerprint_file(path, ffmpeg_cmd='ffmpeg'):
+    """Fingerprint an audio file"""
+    return fingerprint_samples(decode_pcm(path, ffmpeg_cmd))
+
+class FingerprintIndex:
+    """SQLite-backed index of audio fingerprints and the transcripts they produced"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tracks (
+                    video_id TEXT PRIMARY KEY,
+                    hash_count INTEGER NOT NULL,
+                    transcript TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    hash INTEGER NOT NULL,
+                    video_id TEXT NOT NULL,
+                    offset INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_fingerprints_hash ON fingerprints(hash);
+                CREATE INDEX IF NOT EXISTS idx_fingerprints_video ON fingerprints(video_id);
+            """)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, video_id, fingerprint, transcript):
+        """Store the fingerprint and transcript of a video, replacing any previous one"""
+        hashes, offsets = fingerprint
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM fingerprints WHERE video_id = ?", (video_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?)",
+                (video_id, len(hashes), transcript, time.strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            conn.executemany(
+                "INSERT INTO fingerprints VALUES (?, ?, ?)",
+                zip(hashes.tolist(), [video_id] * len(hashes), offsets.tolist())
+            )
+
+    def transcripts(self):
+        """(video_id, transcript) of every stored track"""
+        with self._connect() as conn:
+            return conn.execute("SELECT video_id, transcript FROM tracks ORDER BY created_at").fetchall()
+
+    def find_match(self, fingerprint, exclude=None, threshold=MATCH_THRESHOLD):
+        """Return the best stored track matching the fingerprint, or None
+
+        The result is a dict with video_id, transcript and score, where score
+        is the fraction of sampled query hashes aligned at one time offset,
+        scaled by the ratio of the shorter to the longer hash count. Tracks
+        whose hash count differs from the query's by more than
+        HASH_COUNT_TOLERANCE are never matched.
+        """
+        hashes, offsets = fingerprint
+        if len(hashes) == 0:
+            return None
+
+        # Look up an evenly spaced sample of query hashes through a temp table
+        # join, so long recordings cost a bounded number of index probes
+        step = max(1, len(hashes) // QUERY_HASHES)
+        sample = list(zip(hashes[::step].tolist(), offsets[::step].tolist()))
+
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE query (hash INTEGER, offset INTEGER)")
+            conn.executemany("INSERT INTO query VALUES (?, ?)", sample)
+            rows = conn.execute("""
+                SELECT f.video_id, f.offset - q.offset AS delta, COUNT(*) AS aligned, t.hash_count
+                FROM query q
+                JOIN fingerprints f ON f.hash = q.hash
+                JOIN tracks t ON t.video_id = f.video_id
+                WHERE f.video_id != ?
+                GROUP BY f.video_id, delta
+                ORDER BY aligned DESC
+                LIMIT ?
+            """, (exclude or '', MATCH_CANDIDATES)).fetchall()
+
+            best = None
+            for video_id, _, aligned, hash_count in rows:
+                if aligned < MIN_ALIGNED_HASHES:
+                    break
+                shorter, longer = sorted((len(hashes), hash_count))
+                if longer - shorter > HASH_COUNT_TOLERANCE * longer:
+                    continue
+                score = aligned / len(sample) * shorter / longer
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (video_id, score)
+            if best is None:
+                return None
+            transcript = conn.execute(
+                "SELECT transcript FROM tracks WHERE video_id = ?", (best[0],)
+            ).fetchone()[0]
+
+        return {'video_id': best[0], 'transcript': transcript, 'score': best[1]}
+
+@st.cache_resource
+def get_fingerprint_index():
+    """Process-wide fingerprint index"""
+    return FingerprintIndex(get_settings()['fingerprint_db_path'])
+
+on_reload(get_fingerprint_index.clear)
@@ -0,0 +1,119 @@
+"""Cold-start import benchmark for the Streamlit app and its pages
+
+Each script is rendered once in a fresh interpreter running under
+``python -X importtime``, using Streamlit's AppTest harness with an
+authenticated session. Only imports made after Streamlit itself is loaded
+are counted, so the report shows what the app and each page add on top of
+the framework. Modules imported lazily by a feature (pyvis for the graph
+tab, pandas for the relationships table, ...) only show up once that
+feature is used, so they are absent from a first render.
+
+Usage:
+    python benchmarks/import_time.py                  # app and every page
+    python benchmarks/import_time.py pages/3_Knowledge_Base_Viewer.py
+    python benchmarks/import_time.py --budget-ms 500  # exit 1 over budget
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "import-benchmark-start"
+
+# Dependencies that should only load when the feature that needs them is used
+HEAVY_MODULES = ('pandas', 'networkx', 'pyvis', 'matplotlib', 'groq', 'PIL', 'scipy')
+
+CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+at = AppTest.from_file({path!r}, default_timeout=120)
+at.session_state['password_correct'] = True
+at.run()
+print(json.dumps({{
+    'render_ms': (time.perf_counter() - start) * 1000,
+    'exceptions': [e.value for e in at.exception]
+}}))
+"""
+
+def default_scripts():
+    """streamlit_app.py followed by every page"""
+    pages = sorted(glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+    return [os.path.join(ROOT, 'streamlit_app.py')] + pages
+
+def parse_importtime(stderr):
+    """(name, depth, self_us, cumulative_us) for every import logged after MARKER"""
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    entries = []
+    for line in lines:
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # Nested imports are indented two spaces per level under their importer
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+def measure(path):
+    """Render a script once in a fresh interpreter and collect its imports"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD.format(marker=MARKER, path=path)],
+        capture_output=True, text=True, cwd=ROOT, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{path} failed:\n{result.stderr[-2000:]}")
+    run = json.loads(result.stdout.strip().splitlines()[-1])
+    entries = parse_importtime(result.stderr)
+    top_level = [(name, cumulative) for name, depth, _, cumulative in entries if depth == 0]
+    loaded = {name.split('.')[0] for name, _, _, _ in entries}
+    return {
+        'script': os.path.relpath(path, ROOT),
+        'import_ms': sum(cumulative for _, cumulative in top_level) / 1000,
+        'render_ms': run['render_ms'],
+        'modules': sorted(top_level, key=lambda e: e[1], reverse=True),
+        'heavy': [name for name in HEAVY_MODULES if name in loaded],
+        'exceptions': run['exceptions']
+    }
+
+def report(result, top):
+    print(f"{result['script']}")
+    print(f"  imports: {result['import_ms']:.1f} ms, first render: {result['render_ms']:.1f} ms")
+    print(f"  heavy modules loaded: {', '.join(result['heavy']) or 'none'}")
+    for name, cumulative in result['modules'][:top]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+    for exception in result['exceptions']:
+        print(f"  exception during render: {exception}")
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scripts', nargs='*', help="scripts to measure (default: app and all pages)")
+    parser.add_argument('--top', type=int, default=10, help="modules to list per script")
+    parser.add_argument('--budget-ms', type=float, help="fail if any script's imports exceed this")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    scripts = [os.path.abspath(s) for s in args.scripts] or default_scripts()
+    results = [measure(path) for path in scripts]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            report(result, args.top)
+
+    over_budget = [r['script'] for r in results if args.budget_ms and r['import_ms'] > args.budget_ms]
+    if over_budget:
+        print(f"Over the {args.budget_ms:.0f} ms import budget: {', '.join(over_budget)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Multi-session load test of page reruns using Streamlit's AppTest
+
+Simulates --sessions analysts working at the same time, each on its own
+thread with its own session state, against the stand-in servers from
+stub_servers.py. Every session walks through a realistic flow:
+
+    login     fill in and submit the check_password form
+    search    run a search on the search page
+    select    select --select videos, one rerun each
+    process   open the downloader page, which converts and transcribes them
+    generate  click "Generate Knowledge Base"
+    view      open the Knowledge Base Viewer and visit each tab
+
+Each interaction's rerun latency is recorded, along with how much process
+memory the sessions added (after an untimed warm-up session) and how large
+each session's state is. Results
+are written as JSON so runs can be compared; with --baseline the run fails
+when a step's p95 latency regresses by more than --tolerance.
+
+Usage:
+    python benchmarks/load_test.py --sessions 20 --report load_test.json
+    python benchmarks/load_test.py --sessions 20 --baseline load_test.json
+"""
+import argparse
+import json
+import os
+import pickle
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streamlit.testing.v1 import AppTest
+from stub_servers import StubServer
+from pipeline import percentile
+
+USERNAME = "loadtest"
+PASSWORD = "loadtest-password"
+VIEWER_TABS = ["Overview", "Knowledge Graph", "Relationships Table", "Document Structure", "Analytics"]
+
+def current_rss_mb():
+    """Resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def state_size(session_state):
+    """Approximate bytes held by a session's state"""
+    total = 0
+    for key in session_state.keys():
+        try:
+            total += len(pickle.dumps(session_state[key]))
+        except Exception:
+            total += sys.getsizeof(session_state[key])
+    return total
+
+def share_runtime():
+    """Serve one mock Runtime to every AppTest run
+
+    AppTest installs a fresh mock Runtime singleton for each run and clears
+    it afterwards, so runs on concurrent threads would pull it out from under
+    each other. Sharing one also shares st.cache_* between sessions, as a
+    real server does.
+    """
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.components.v2.component_manager import BidiComponentManager
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    components = BidiComponentManager()
+    components.discover_and_register_components(start_file_watching=False)
+    runtime.bidi_component_registry = components
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+def button(at, label):
+    """First button with the given label, or None"""
+    return next((b for b in at.button if b.label == label), None)
+
+class Session:
+    """One simulated analyst moving through the pages with a shared session state"""
+
+    def __init__(self, index, timeout, select):
+        self.index = index
+        self.timeout = timeout
+        self.select = select
+        self.state = {}
+        self.timings = []
+        self.errors = []
+
+    def page(self, path):
+        at = AppTest.from_file(os.path.join(ROOT, path), default_timeout=self.timeout)
+        for key, value in self.state.items():
+            at.session_state[key] = value
+        return at
+
+    def keep(self, at):
+        """Carry session state over to the next page, as the browser session would"""
+        self.state = {key: at.session_state[key] for key in at.session_state.keys()}
+
+    def step(self, name, action):
+        start = time.perf_counter()
+        try:
+            at = action()
+        except Exception as e:
+            self.errors.append({'step': name, 'error': f"{type(e).__name__}: {e}"})
+            raise
+        self.timings.append((name, time.perf_counter() - start))
+        if at.exception:
+            self.errors.append({'step': name, 'error': at.exception[0].value})
+        return at
+
+    def run(self):
+        try:
+            self.flow()
+        except Exception as e:
+            if not self.errors:
+                self.errors.append({'step': 'flow', 'error': f"{type(e).__name__}: {e}"})
+        return self
+
+    def flow(self):
+        app = self.page('streamlit_app.py')
+        self.step('open', app.run)
+        app.text_input(key='username').input(USERNAME)
+        app.text_input(key='password').input(PASSWORD)
+        self.step('login', button(app, "Log in").click().run)
+        if not app.session_state['password_correct']:
+            self.errors.append({'step': 'login', 'error': "login rejected"})
+            return
+        self.keep(app)
+
+        search = self.page('pages/1_YouTube_Search.py')
+        self.step('open_search', search.run)
+        search.text_input[0].input(f"load test {self.index}")
+        self.step('search', button(search, "Search").click().run)
+        for _ in range(self.select):
+            select = button(search, "Select for Transcription")
+            if not select:
+                break
+            self.step('select', select.click().run)
+        self.keep(search)
+
+        downloader = self.page('pages/2_YouTube_Downloader.py')
+        self.step('process', downloader.run)
+        generate = button(downloader, "Generate Knowledge Base")
+        if generate:
+            self.step('generate', generate.click().run)
+        self.keep(downloader)
+
+        if self.state.get('knowledge_base') is not None:
+            viewer = self.page('pages/3_Knowledge_Base_Viewer.py')
+            self.step('open_viewer', viewer.run)
+            for tab in VIEWER_TABS[1:]:
+                viewer.session_state['knowledge_base_tab'] = tab
+                self.step('view_tab', viewer.run)
+            self.keep(viewer)
+        else:
+            self.errors.append({'step': 'generate', 'error': "no knowledge base produced"})
+
+def summarize(sessions):
+    steps = {}
+    for session in sessions:
+        for name, latency in session.timings:
+            steps.setdefault(name, []).append(latency)
+    return {
+        name: {
+            'count': len(values),
+            'mean_ms': 1000 * sum(values) / len(values),
+            'p50_ms': 1000 * percentile(values, 50),
+            'p95_ms': 1000 * percentile(values, 95),
+            'max_ms': 1000 * max(values)
+        } for name, values in steps.items()
+    }
+
+def compare(report, baseline, tolerance):
+    """Steps whose p95 latency grew by more than tolerance relative to the baseline"""
+    regressions = []
+    for name, step in report['steps'].items():
+        before = baseline.get('steps', {}).get(name)
+        if before and before['p95_ms'] > 0 and step['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append((name, before['p95_ms'], step['p95_ms']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--select', type=int, default=2, help="videos each session selects")
+    parser.add_argument('--latency-ms', type=float, default=20, help="added to every stub request")
+    parser.add_argument('--audio-seconds', type=float, default=30)
+    parser.add_argument('--timeout', type=float, default=300, help="seconds allowed per rerun")
+    parser.add_argument('--report', help="write the JSON report here")
+    parser.add_argument('--baseline', help="earlier report to compare p95 latencies against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    stub = StubServer(
+        latency=args.latency_ms / 1000,
+        processing_polls=1,
+        results=10,
+        audio_seconds=args.audio_seconds,
+        kb_relationships=300
+    ).start()
+    data_dir = tempfile.mkdtemp(prefix='load-test-')
+    os.environ.update(stub.environ())
+    os.environ.update({
+        'ADMIN_USERNAME': USERNAME,
+        'ADMIN_PASSWORD': PASSWORD,
+        'FINGERPRINT_DB_PATH': os.path.join(data_dir, 'fingerprints.db'),
+        'GRAPH_STORE_PATH': os.path.join(data_dir, 'knowledge_graph.db'),
+        'SEARCH_INDEX_PATH': os.path.join(data_dir, 'search_index.db'),
+        'TRANSCRIPT_INDEX_PATH': os.path.join(data_dir, 'transcript_index.db'),
+        'EXPORT_DIR': os.path.join(data_dir, 'exports'),
+        'AUDIO_CACHE_DIR': os.path.join(data_dir, 'audio_cache'),
+        'SESSION_STORE_DIR': os.path.join(data_dir, 'session_store'),
+        'METRICS_FILE': os.path.join(data_dir, 'metrics.prom')
+    })
+    os.environ.pop('METRICS_PORT', None)
+
+    import conversion
+    from settings import reload_settings
+    from streamlit.logger import set_log_level
+    reload_settings()
+    conversion.POLL_INTERVAL = 0.1
+    set_log_level('error')
+    share_runtime()
+
+    # One untimed session first, so imports and warm caches are not billed to the measured sessions
+    Session(-1, args.timeout, args.select).run()
+    rss_before = current_rss_mb()
+    sessions = [Session(i, args.timeout, args.select) for i in range(args.sessions)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        list(pool.map(Session.run, sessions))
+    wall = time.perf_counter() - start
+    rss_after = current_rss_mb()
+
+    stub.stop()
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+    state_sizes = [state_size(session.state) for session in sessions]
+    report = {
+        'config': {
+            'sessions': args.sessions, 'select': args.select,
+            'latency_ms': args.latency_ms, 'audio_seconds': args.audio_seconds
+        },
+        'wall_s': wall,
+        'steps': summarize(sessions),
+        'errors': [dict(e, session=s.index) for s in sessions for e in s.errors],
+        'memory': {
+            'rss_before_mb': rss_before,
+            'rss_after_mb': rss_after,
+            'per_session_mb': (rss_after - rss_before) / max(args.sessions, 1),
+            'session_state_kb_mean': sum(state_sizes) / max(len(state_sizes), 1) / 1024,
+            'session_state_kb_max': max(state_sizes, default=0) / 1024
+        }
+    }
+
+    print(f"{args.sessions} sessions in {wall:.1f} s, {len(report['errors'])} errors")
+    print(f"{'step':<14}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, step in report['steps'].items():
+        print(
+            f"{name:<14}{step['count']:>7}{step['mean_ms']:>10.1f}{step['p50_ms']:>10.1f}"
+            f"{step['p95_ms']:>10.1f}{step['max_ms']:>10.1f}"
+        )
+    memory = report['memory']
+    print(
+        f"\nRSS {memory['rss_before_mb']:.0f} -> {memory['rss_after_mb']:.0f} MB "
+        f"({memory['per_session_mb']:.1f} MB per session), "
+        f"session state {memory['session_state_kb_mean']:.0f} KB mean / {memory['session_state_kb_max']:.0f} KB max"
+    )
+    for error in report['errors'][:10]:
+        print(f"  session {error['session']} {error['step']}: {error['error']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f"Regression in {name}: p95 {before:.1f} -> {after:.1f} ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Offline throughput benchmark for search, processing and KB generation
+
+Starts the stand-in servers from stub_servers.py, points the app's settings
+at them (with data files in a temporary directory) and drives the real code
+paths:
+
+    search          search_youtube() from the search page
+    process         YouTubeDownloader.check_conversion_status() followed by
+                    download_and_process_file() for each search result
+    knowledge_base  YouTubeDownloader.generate_knowledge_base() over the
+                    combined transcripts
+
+Each scenario runs its operations on --concurrency threads and reports
+throughput, p50/p95 latency, errors and peak Python memory, followed by the
+pipeline's own per-stage timings. Processing needs ffmpeg on PATH.
+
+Usage:
+    python benchmarks/pipeline.py --videos 8 --concurrency 4 --latency-ms 50
+"""
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_servers import StubServer
+
+def load_page(filename, name):
+    """Import a Streamlit page as a module without running its main()"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'pages', filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def percentile(values, q):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+class StatusSink:
+    """Stands in for the st.empty() placeholder YouTubeDownloader reports into"""
+
+    def __init__(self):
+        self.errors = []
+
+    def info(self, message):
+        pass
+
+    def error(self, message):
+        self.errors.append(message)
+
+def run_scenario(name, operation, items, concurrency):
+    """Run operation over items on a thread pool; falsy results count as errors"""
+    latencies, errors = [], 0
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            ok = bool(operation(item))
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ok, latency in pool.map(timed, items):
+            latencies.append(latency)
+            errors += not ok
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'scenario': name,
+        'operations': len(items),
+        'errors': errors,
+        'wall_s': wall,
+        'throughput': len(items) / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'peak_python_mb': peak / 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--searches', type=int, default=20)
+    parser.add_argument('--videos', type=int, default=8)
+    parser.add_argument('--kb-runs', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=20, help="added to every stub request")
+    parser.add_argument('--processing-polls', type=int, default=2, help="'processing' answers before a link is ready")
+    parser.add_argument('--poll-interval', type=float, default=0.2, help="seconds between conversion polls")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="fraction of conversions that fail")
+    parser.add_argument('--audio-seconds', type=float, default=60)
+    parser.add_argument('--transcription-speed', type=float, default=0, help="audio seconds per second, 0 for instant")
+    parser.add_argument('--kb-seconds', type=float, default=0.5, help="time to stream each knowledge base")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    stub = StubServer(
+        latency=args.latency_ms / 1000,
+        processing_polls=args.processing_polls,
+        failure_rate=args.failure_rate,
+        results=max(args.videos, 1),
+        audio_seconds=args.audio_seconds,
+        transcription_speed=args.transcription_speed,
+        kb_seconds=args.kb_seconds
+    ).start()
+
+    data_dir = tempfile.mkdtemp(prefix='pipeline-benchmark-')
+    os.environ.update(stub.environ())
+    os.environ.update({
+        'FINGERPRINT_DB_PATH': os.path.join(data_dir, 'fingerprints.db'),
+        'GRAPH_STORE_PATH': os.path.join(data_dir, 'knowledge_graph.db'),
+        'SEARCH_INDEX_PATH': os.path.join(data_dir, 'search_index.db'),
+        'TRANSCRIPT_INDEX_PATH': os.path.join(data_dir, 'transcript_index.db'),
+        'EXPORT_DIR': os.path.join(data_dir, 'exports'),
+        'AUDIO_CACHE_DIR': os.path.join(data_dir, 'audio_cache'),
+        'SESSION_STORE_DIR': os.path.join(data_dir, 'session_store'),
+        'METRICS_FILE': os.path.join(data_dir, 'metrics.prom')
+    })
+    os.environ.pop('METRICS_PORT', None)
+
+    import conversion
+    from settings import reload_settings
+    from metrics import get_metrics
+    reload_settings()
+    conversion.POLL_INTERVAL = args.poll_interval
+
+    search_page = load_page('1_YouTube_Search.py', 'search_page')
+    downloader_page = load_page('2_YouTube_Downloader.py', 'downloader_page')
+    # Silence the bare-mode warnings Streamlit logs for calls made outside `streamlit run`
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+
+    results = []
+    results.append(run_scenario(
+        'search',
+        lambda i: search_page.search_youtube(f"benchmark query {i}"),
+        list(range(args.searches)),
+        args.concurrency
+    ))
+
+    videos = search_page.search_youtube("benchmark videos")['data'][:args.videos]
+    transcripts = {}
+
+    def process(video):
+        downloader = downloader_page.YouTubeDownloader()
+        downloader.status_placeholder = StatusSink()
+        link = downloader.check_conversion_status(video['videoId'])
+        if not link:
+            return False
+        text = downloader.download_and_process_file(link, video['videoId'], video['title'])
+        if text:
+            transcripts[video['videoId']] = text
+        return text
+
+    results.append(run_scenario('process', process, videos, args.concurrency))
+
+    combined = "\n\n".join(transcripts.values()) or "benchmark transcript"
+    urls = [f"https://youtube.com/watch?v={video_id}" for video_id in transcripts]
+
+    def generate(i):
+        downloader = downloader_page.YouTubeDownloader()
+        downloader.status_placeholder = StatusSink()
+        return downloader.generate_knowledge_base(f"benchmark {i}", 'en', combined, urls) is not None
+
+    results.append(run_scenario('knowledge_base', generate, list(range(args.kb_runs)), args.concurrency))
+
+    stages = get_metrics().stage_summary()
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    stub.stop()
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({
+            'scenarios': results, 'stages': stages, 'peak_rss_mb': peak_rss_mb,
+            'stub_requests': stub.requests
+        }, indent=2))
+        return
+
+    print(f"{'scenario':<16}{'ops':>6}{'errors':>8}{'wall s':>9}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'peak MB':>9}")
+    for r in results:
+        print(
+            f"{r['scenario']:<16}{r['operations']:>6}{r['errors']:>8}{r['wall_s']:>9.2f}{r['throughput']:>9.2f}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['peak_python_mb']:>9.1f}"
+        )
+    print(f"\nPeak process RSS: {peak_rss_mb:.0f} MB")
+    print(f"Stub requests: {', '.join(f'{k}={v}' for k, v in sorted(stub.requests.items()))}")
+    print(f"\n{'stage':<16}{'calls':>6}{'errors':>8}{'total s':>9}{'mean s':>9}{'share':>8}")
+    for s in stages:
+        print(f"{s['stage']:<16}{s['calls']:>6}{s['errors']:>8}{s['total_s']:>9.2f}{s['mean_s']:>9.3f}{s['share']:>7.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Local stand-ins for the paid APIs used by the pipeline
+
+One HTTP server emulates every upstream the app talks to:
+
+    GET  /search?query=...             yt-api search results
+    GET  /playlist?id=...&token=...    yt-api playlist items, list_size videos
+    GET  /channel/videos?id=...        yt-api channel uploads (also forUsername=),
+                                       both paged by page_size with continuation tokens
+    GET  /thumbnail/<video_id>.png     search result thumbnails
+    GET  /dl?id=<video_id>             youtube-mp36 conversion; answers "processing"
+                                       for the first --processing-polls requests
+                                       and "fail" for --failure-rate of videos
+    GET  /audio/<video_id>.mp3         the converted audio, unique per video
+    POST .../audio/transcriptions      Groq-compatible verbose_json transcription; uploads
+                                       are throttled to --upload-mbps when set
+    POST /v1/workflows/run             KB workflow, streamed back in chunks
+
+Run it standalone and point the app at it with the printed variables:
+
+    python benchmarks/stub_servers.py --port 8765 --latency-ms 50
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import struct
+import threading
+import time
+import wave
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+
+SAMPLE_RATE = 8000
+VIDEO_ID_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+WORDS = (
+    "data model graph network layer training signal memory cache query index vector "
+    "python stream latency service cluster token language audio search research"
+).split()
+
+DEFAULT_CONFIG = {
+    'latency': 0.0,             # seconds added to every request
+    'processing_polls': 2,      # /dl answers "processing" this many times per video
+    'failure_rate': 0.0,        # fraction of videos whose conversion fails
+    'results': 20,              # videos per search
+    'list_size': 200,           # videos in every playlist and channel
+    'page_size': 30,            # playlist and channel items per page
+    'audio_seconds': 60,        # length of every converted track
+    'transcription_speed': 0,   # audio seconds transcribed per second; 0 answers at once
+    'upload_mbps': 0,           # simulated upload bandwidth for transcriptions; 0 is unlimited
+    'kb_seconds': 0.0,          # time taken to stream a knowledge base
+    'kb_relationships': 200,    # relationships per generated knowledge base
+    'seed': 0
+}
+
+def _digest(*parts):
+    return hashlib.sha256("\0".join(str(p) for p in parts).encode('utf-8')).digest()
+
+def video_id_for(query, index, seed=0):
+    """Stable 11-character video ID for a search result"""
+    digest = _digest('video', seed, query, index)
+    return "".join(VIDEO_ID_ALPHABET[b % len(VIDEO_ID_ALPHABET)] for b in digest[:11])
+
+def synth_audio(video_id, seconds, seed=0):
+    """A WAV track of random tone steps, distinct per video so fingerprints differ"""
+    rng = np.random.default_rng(int.from_bytes(_digest('audio', seed, video_id)[:8], 'little'))
+    step = SAMPLE_RATE // 4
+    n_steps = max(1, int(seconds * 4))
+    freqs = np.repeat(rng.uniform(200, 3000, size=(n_steps, 2)), step, axis=0)
+    t = np.arange(len(freqs)) / SAMPLE_RATE
+    signal = 0.4 * np.sin(2 * np.pi * freqs[:, 0] * t) + 0.3 * np.sin(2 * np.pi * freqs[:, 1] * t)
+    signal += 0.02 * rng.standard_normal(len(signal))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes((np.clip(signal, -1, 1) * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+def synth_png(video_id, width=160, height=90):
+    """A solid-colour PNG thumbnail"""
+    r, g, b = _digest('thumb', video_id)[:3]
+    raw = b"".join(b"\0" + bytes((r, g, b)) * width for _ in range(height))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(raw))
+        + chunk(b'IEND', b"")
+    )
+
+def synth_words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def stub(self):
+        return self.server.stub
+
+    def _send(self, body, content_type='application/json', status=200):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.stub.config['latency'])
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == '/search':
+            self._send(self.stub.search(params.get('query', '')))
+        elif url.path.startswith('/thumbnail/'):
+            self._send(synth_png(url.path.rsplit('/', 1)[1].split('.')[0]), 'image/png')
+        elif url.path == '/playlist':
+            self._send(self.stub.video_list('playlist', params.get('id', ''), params.get('token')))
+        elif url.path == '/channel/videos':
+            source = params.get('id') or params.get('forUsername', '')
+            self._send(self.stub.video_list('channel', source, params.get('token')))
+        elif url.path == '/dl':
+            self._send(self.stub.convert(params.get('id', '')))
+        elif url.path.startswith('/audio/'):
+            self._send(self.stub.audio(url.path.rsplit('/', 1)[1].split('.')[0]), 'audio/mpeg')
+        else:
+            self._send({'message': 'not found'}, status=404)
+
+    def do_POST(self):
+        time.sleep(self.stub.config['latency'])
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = urlparse(self.path).path
+        if path.endswith('/audio/transcriptions'):
+            if self.stub.config['upload_mbps']:
+                time.sleep(len(body) * 8 / (self.stub.config['upload_mbps'] * 1e6))
+            self._send(self.stub.transcribe(body))
+        elif path.endswith('/workflows/run'):
+            self._stream(self.stub.knowledge_base(json.loads(body or b'{}')))
+        else:
+            self._send({'message': 'not found'}, status=404)
+
+    def _stream(self, document):
+        """Send a JSON document in chunks spread over kb_seconds"""
+        body = json.dumps(document).encode('utf-8')
+        chunks = [body[i:i + 4096] for i in range(0, len(body), 4096)] or [b""]
+        delay = self.stub.config['kb_seconds'] / len(chunks)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for chunk in chunks:
+            time.sleep(delay)
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+class StubServer:
+    """All stand-in endpoints on one local port"""
+
+    def __init__(self, port=0, **config):
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.lock = threading.Lock()
+        self.polls = {}
+        self.audio_cache = {}
+        self.requests = {}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='stub-servers', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def environ(self):
+        """Environment variables that point the app's settings at this server"""
+        return {
+            'RAPIDAPI_KEY': 'stub-key',
+            'YT_RAPIDAPI_HOST': 'yt-api.stub',
+            'RAPIDAPI_HOST': 'youtube-mp36.stub',
+            'GROQ_API_KEY': 'stub-key',
+            'KNOWLEDGE_BASE_API_KEY': 'stub-key',
+            'YT_API_BASE_URL': self.url,
+            'MP3_API_BASE_URL': self.url,
+            'GROQ_BASE_URL': self.url,
+            'KB_API_ENDPOINT': f"{self.url}/v1/workflows/run"
+        }
+
+    def _count(self, endpoint):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def _video_item(self, query, index, rng):
+        video_id = video_id_for(query, index, self.config['seed'])
+        minutes, seconds = divmod(int(self.config['audio_seconds']), 60)
+        return {
+            'type': 'video',
+            'videoId': video_id,
+            'title': f"{query} {synth_words(rng, 4)}",
+            'channelTitle': f"Channel {rng.randint(1, 50)}",
+            'viewCount': str(rng.randint(100, 5_000_000)),
+            'lengthText': f"{minutes}:{seconds:02d}",
+            'description': synth_words(rng, 30),
+            'thumbnail': [{'url': f"{self.url}/thumbnail/{video_id}.png", 'width': 160, 'height': 90}]
+        }
+
+    def search(self, query):
+        self._count('search')
+        rng = random.Random(_digest('search', self.config['seed'], query))
+        return {'data': [self._video_item(query, i, rng) for i in range(self.config['results'])]}
+
+    def video_list(self, kind, source, token=None):
+        """One page of a playlist or channel; the continuation token is the next offset"""
+        self._count(kind)
+        start = int(token or 0)
+        end = min(start + self.config['page_size'], self.config['list_size'])
+        rng = random.Random(_digest(kind, self.config['seed'], source, start))
+        items = [self._video_item(f"{kind} {source}", i, rng) for i in range(start, end)]
+        page = {'meta': {'title': f"{kind} {source}"}, 'data': items}
+        if end < self.config['list_size']:
+            page['continuation'] = str(end)
+        return page
+
+    def convert(self, video_id):
+        self._count('dl')
+        with self.lock:
+            self.polls[video_id] = self.polls.get(video_id, 0) + 1
+            polls = self.polls[video_id]
+        failing = _digest('fail', self.config['seed'], video_id)[0] / 256 < self.config['failure_rate']
+        if failing:
+            return {'status': 'fail', 'msg': 'Stub conversion failure'}
+        if polls <= self.config['processing_polls']:
+            return {'status': 'processing', 'progress': int(100 * polls / (self.config['processing_polls'] + 1))}
+        return {'status': 'ok', 'link': f"{self.url}/audio/{video_id}.mp3", 'title': video_id}
+
+    def audio(self, video_id):
+        self._count('audio')
+        with self.lock:
+            data = self.audio_cache.get(video_id)
+        if data is None:
+            data = synth_audio(video_id, self.config['audio_seconds'], self.config['seed'])
+            with self.lock:
+                self.audio_cache[video_id] = data
+        return data
+
+    def transcribe(self, body):
+        self._count('transcriptions')
+        duration = float(self.config['audio_seconds'])
+        if self.config['transcription_speed']:
+            time.sleep(duration / self.config['transcription_speed'])
+        rng = random.Random(hashlib.sha256(body).digest())
+        segments = [{
+            'id': i,
+            'start': float(start),
+            'end': float(min(start + 5, duration)),
+            'text': " " + synth_words(rng, 12) + "."
+        } for i, start in enumerate(range(0, int(duration), 5))]
+        return {
+            'task': 'transcribe',
+            'language': 'english',
+            'duration': duration,
+            'text': "".join(s['text'] for s in segments).strip(),
+            'segments': segments
+        }
+
+    def knowledge_base(self, payload):
+        self._count('workflows')
+        inputs = payload.get('inputs', {})
+        rng = random.Random(_digest('kb', self.config['seed'], inputs.get('transcription', '')))
+        entities = [f"{word.capitalize()} {i}" for i, word in enumerate(rng.choice(WORDS) for _ in range(60))]
+        relationships = [{
+            'entity': rng.choice(entities),
+            'relationship': rng.choice(['uses', 'is part of', 'improves', 'depends on']),
+            'attribute': rng.choice(entities),
+            'description': synth_words(rng, 15)
+        } for _ in range(self.config['kb_relationships'])]
+        headings = [{'heading': f"h{rng.randint(2, 4)}", 'value': synth_words(rng, 3).title()} for _ in range(10)]
+        return [inputs.get('keyword', ''), relationships, headings]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--processing-polls', type=int, default=DEFAULT_CONFIG['processing_polls'])
+    parser.add_argument('--failure-rate', type=float, default=DEFAULT_CONFIG['failure_rate'])
+    parser.add_argument('--audio-seconds', type=float, default=DEFAULT_CONFIG['audio_seconds'])
+    parser.add_argument('--transcription-speed', type=float, default=DEFAULT_CONFIG['transcription_speed'])
+    parser.add_argument('--upload-mbps', type=float, default=DEFAULT_CONFIG['upload_mbps'])
+    parser.add_argument('--kb-seconds', type=float, default=DEFAULT_CONFIG['kb_seconds'])
+    args = parser.parse_args()
+
+    server = StubServer(
+        args.port,
+        latency=args.latency_ms / 1000,
+        processing_polls=args.processing_polls,
+        failure_rate=args.failure_rate,
+        audio_seconds=args.audio_seconds,
+        transcription_speed=args.transcription_speed,
+        upload_mbps=args.upload_mbps,
+        kb_seconds=args.kb_seconds
+    )
+    print(f"Stub servers listening on {server.url}")
+    for name, value in server.environ().items():
+        print(f"export {name}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
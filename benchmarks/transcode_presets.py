@@ -0,0 +1,212 @@
+"""Encode time, upload size and transcription time of each transcode preset
+
+Runs a corpus of local audio files through every preset in transcode.py
+and uploads each result to a transcription endpoint. By default that is
+the Groq stand-in from stub_servers.py, throttled to --upload-mbps so
+smaller files transcribe faster, as they do against the real API. For
+each preset it reports:
+
+    encode s      wall time of the ffmpeg run, per file
+    cpu s         ffmpeg CPU time (user + system), per file
+    size KB       output size, per file, and its share of the source size
+    transcribe s  time to upload and transcribe, per file
+
+With --groq-base-url (and GROQ_API_KEY) the uploads go to a real endpoint
+instead, and --reference PRESET adds the word error rate of each preset's
+transcripts against that preset's, as a measure of accuracy lost. Against
+the stand-in, transcripts are random and the error rate is meaningless.
+
+Without --corpus, --synth files of tone sequences are generated. They are
+enough for timing and size but not representative of speech. Needs ffmpeg
+on PATH.
+
+Usage:
+    python benchmarks/transcode_presets.py --corpus ~/audio-samples --upload-mbps 20
+    python benchmarks/transcode_presets.py --synth 4 --seconds 300 --jobs 4 --json
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_servers import StubServer, synth_audio
+from transcode import TRANSCODE_PRESETS, transcode
+
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.wav', '.ogg', '.opus', '.flac', '.webm', '.aac')
+
+def corpus_files(directory):
+    return sorted(
+        path for path in glob.glob(os.path.join(directory, '**', '*'), recursive=True)
+        if path.lower().endswith(AUDIO_EXTENSIONS)
+    )
+
+def synth_corpus(directory, count, seconds):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"synth_{i}.wav")
+        with open(path, 'wb') as f:
+            f.write(synth_audio(f"preset-benchmark-{i}", seconds))
+        paths.append(path)
+    return paths
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length"""
+    ref, hyp = reference.split(), hypothesis.split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def run_file(preset, path, out_dir, model, transcribe):
+    """Encode one file with a preset and transcribe it"""
+    target = os.path.join(out_dir, f"{preset}_{os.path.basename(path)}.ogg")
+    start = time.perf_counter()
+    transcode(path, target, preset)
+    encode_s = time.perf_counter() - start
+    result = {
+        'file': os.path.basename(path),
+        'encode_s': encode_s,
+        'source_bytes': os.path.getsize(path),
+        'output_bytes': os.path.getsize(target)
+    }
+    if transcribe:
+        from settings import get_groq_client
+        with open(target, 'rb') as f:
+            data = f.read()
+        start = time.perf_counter()
+        transcription = get_groq_client().audio.transcriptions.create(
+            file=(target, data), model=model, response_format="verbose_json"
+        )
+        result['transcribe_s'] = time.perf_counter() - start
+        result['text'] = transcription.text
+    return result
+
+def run_preset(preset, files, out_dir, model, transcribe, jobs):
+    cpu_before = children_cpu()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(lambda path: run_file(preset, path, out_dir, model, transcribe), files))
+    wall = time.perf_counter() - start
+    cpu = children_cpu() - cpu_before
+
+    def mean(key):
+        values = [r[key] for r in results if key in r]
+        return sum(values) / len(values) if values else None
+
+    source = sum(r['source_bytes'] for r in results)
+    output = sum(r['output_bytes'] for r in results)
+    return {
+        'preset': preset,
+        'settings': {k: v for k, v in TRANSCODE_PRESETS[preset].items() if k != 'label'},
+        'files': len(results),
+        'wall_s': wall,
+        'encode_s': mean('encode_s'),
+        'cpu_s': cpu / len(results),
+        'output_kb': output / len(results) / 1024,
+        'size_ratio': output / source if source else None,
+        'transcribe_s': mean('transcribe_s'),
+        'transcripts': [r.get('text') for r in results]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help="directory of audio files to encode")
+    parser.add_argument('--synth', type=int, default=3, help="synthetic files to generate without --corpus")
+    parser.add_argument('--seconds', type=float, default=120, help="length of each synthetic file")
+    parser.add_argument('--presets', help="comma-separated presets, default all")
+    parser.add_argument('--jobs', type=int, default=1, help="files encoded at the same time")
+    parser.add_argument('--model', default="whisper-large-v3-turbo")
+    parser.add_argument('--upload-mbps', type=float, default=10, help="stand-in upload bandwidth")
+    parser.add_argument('--transcription-speed', type=float, default=0, help="stand-in audio seconds per second")
+    parser.add_argument('--groq-base-url', help="transcribe against this endpoint instead of the stand-in")
+    parser.add_argument('--no-transcribe', action='store_true', help="only measure encoding")
+    parser.add_argument('--reference', help="preset whose transcripts the others are scored against")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    presets = args.presets.split(',') if args.presets else list(TRANSCODE_PRESETS)
+    unknown = [p for p in presets + ([args.reference] if args.reference else []) if p not in TRANSCODE_PRESETS]
+    if unknown:
+        parser.error(f"unknown presets: {', '.join(unknown)}")
+    if args.reference and args.reference not in presets:
+        presets.insert(0, args.reference)
+
+    work_dir = tempfile.mkdtemp(prefix='preset-benchmark-')
+    stub = None
+    transcribe = not args.no_transcribe
+    if transcribe and args.groq_base_url:
+        os.environ['GROQ_BASE_URL'] = args.groq_base_url
+    elif transcribe:
+        stub = StubServer(
+            audio_seconds=args.seconds,
+            upload_mbps=args.upload_mbps,
+            transcription_speed=args.transcription_speed
+        ).start()
+        os.environ.update({'GROQ_API_KEY': 'stub-key', 'GROQ_BASE_URL': stub.url})
+    if transcribe:
+        from settings import reload_settings
+        from streamlit.logger import set_log_level
+        reload_settings()
+        set_log_level('error')
+
+    try:
+        files = corpus_files(args.corpus) if args.corpus else synth_corpus(work_dir, args.synth, args.seconds)
+        if not files:
+            parser.error(f"no audio files in {args.corpus}")
+        # One untimed run first, so client setup and connection warm-up are not billed to the first preset
+        run_file(presets[0], files[0], work_dir, args.model, transcribe)
+        results = [
+            run_preset(preset, files, work_dir, args.model, transcribe, max(1, args.jobs))
+            for preset in presets
+        ]
+    finally:
+        if stub:
+            stub.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.reference and transcribe:
+        reference = next(r for r in results if r['preset'] == args.reference)['transcripts']
+        for r in results:
+            rates = [word_error_rate(ref, hyp) for ref, hyp in zip(reference, r['transcripts'])]
+            r['wer'] = sum(rates) / len(rates)
+
+    if args.json:
+        for r in results:
+            del r['transcripts']
+        print(json.dumps({'files': len(files), 'jobs': args.jobs, 'results': results}, indent=2))
+        return
+
+    print(f"{len(files)} files, {args.jobs} at a time\n")
+    header = f"{'preset':<26}{'encode s':>10}{'cpu s':>8}{'size KB':>10}{'% src':>7}{'transcribe s':>14}"
+    print(header + (f"{'WER':>7}" if args.reference else ""))
+    for r in results:
+        transcribe_s = f"{r['transcribe_s']:>14.2f}" if r['transcribe_s'] is not None else f"{'-':>14}"
+        line = (
+            f"{r['preset']:<26}{r['encode_s']:>10.2f}{r['cpu_s']:>8.2f}{r['output_kb']:>10.1f}"
+            f"{100 * r['size_ratio']:>6.1f}%{transcribe_s}"
+        )
+        if 'wer' in r:
+            line += f"{100 * r['wer']:>6.1f}%"
+        print(line)
+
+if __name__ == "__main__":
+    main()
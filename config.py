@@ -4,4 +4,38 @@ GROQ_API_KEY = "your_groq_api_key"
 
 # API Hosts
 RAPIDAPI_HOST_YT_SEARCH = "yt-api.p.rapidapi.com"
-RAPIDAPI_HOST_YT_MP3 = "youtube-mp36.p.rapidapi.com" 
\ No newline at end of file
+RAPIDAPI_HOST_YT_MP3 = "youtube-mp36.p.rapidapi.com"
+
+# API base URLs; point these at benchmarks/stub_servers.py to run without quota
+YT_API_BASE_URL = "https://yt-api.p.rapidapi.com"
+MP3_API_BASE_URL = "https://youtube-mp36.p.rapidapi.com"
+GROQ_BASE_URL = None
+
+# Knowledge base workflow API
+KB_API_ENDPOINT = "http://37.27.34.28/v1/workflows/run"
+
+# Local stores
+FINGERPRINT_DB_PATH = "data/fingerprints.db"
+GRAPH_STORE_PATH = "data/knowledge_graph.db"
+SEARCH_INDEX_PATH = "data/search_index.db"
+TRANSCRIPT_INDEX_PATH = "data/transcript_index.db"
+EXPORT_DIR = "data/exports"
+
+# Transcoded audio kept for re-transcription; least recently used files are
+# removed once the cache grows past the quota
+AUDIO_CACHE_DIR = "data/audio_cache"
+AUDIO_CACHE_QUOTA_MB = 2048
+
+# Session state values at least SESSION_OFFLOAD_KB in size are kept on disk;
+# decoded copies are held in memory up to a budget per session and overall
+SESSION_STORE_DIR = "data/session_store"
+SESSION_OFFLOAD_KB = 64
+SESSION_BUDGET_MB = 32
+SESSION_GLOBAL_BUDGET_MB = 256
+
+# Lets logged-in users turn on cProfile profiling of page runs from the sidebar
+ALLOW_PROFILING = False
+
+# Pipeline metrics, in Prometheus text format; set METRICS_PORT to also serve them over HTTP
+METRICS_FILE = "data/metrics.prom"
+METRICS_PORT = None
@@ -0,0 +1,162 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from settings import get_settings, get_http_session, rapidapi_headers
+from metrics import get_metrics
+
+MAX_ATTEMPTS = 15
+POLL_INTERVAL = 4
+
+# Download links from the conversion API stop working after a while, so a
+# prefetched link is only handed out for this many seconds
+LINK_TTL = 30 * 60
+
+PREFETCH_WORKERS = 4
+MAX_PREFETCH_PER_SESSION = 10
+
+# How long a session waits on a running prefetch before polling inline; the
+# default inline poll budget
+LINK_WAIT = MAX_ATTEMPTS * POLL_INTERVAL
+
+def poll_conversion(video_id, on_progress=None, cancelled=None, max_attempts=None, interval=None):
+    """Poll the conversion API until the MP3 download link is ready
+
+    Returns a dict whose `status` is 'ok' (with `link` and `expires_at`),
+    'fail' or 'error' (with `message`), 'timeout' or 'cancelled'. Setting the
+    optional `cancelled` event stops polling at the next attempt.
+    """
+    metrics = get_metrics()
+    with metrics.span('conversion'):
+        result = _poll(
+            video_id, on_progress, cancelled,
+            max_attempts or MAX_ATTEMPTS, POLL_INTERVAL if interval is None else interval
+        )
+    if result['status'] in ('fail', 'timeout'):
+        metrics.error('conversion', result['status'])
+    elif result['status'] == 'error':
+        metrics.error('conversion', result['error_type'])
+    return result
+
+def _poll(video_id, on_progress, cancelled, max_attempts, interval):
+    url = f"{get_settings()['mp3_api_base_url']}/dl"
+    headers = rapidapi_headers('mp3_rapidapi_host')
+    for attempt in range(max_attempts):
+        if cancelled is not None and cancelled.is_set():
+            return {'status': 'cancelled'}
+        try:
+            data = get_http_session().get(url, params={'id': video_id}, headers=headers).json()
+        except Exception as e:
+            return {'status': 'error', 'message': str(e), 'error_type': type(e).__name__}
+
+        if data.get('status') == 'ok':
+            return {'status': 'ok', 'link': data.get('link'), 'expires_at': time.time() + LINK_TTL}
+        elif data.get('status') == 'fail':
+            return {'status': 'fail', 'message': data.get('msg', 'Unknown error')}
+        elif data.get('status') == 'processing' and on_progress:
+            on_progress(attempt + 1, max_attempts)
+
+        if cancelled is not None:
+            if cancelled.wait(interval):
+                return {'status': 'cancelled'}
+        else:
+            time.sleep(interval)
+    return {'status': 'timeout'}
+
+class ConversionPrefetcher:
+    """Speculative background conversions started when a video is selected
+
+    Jobs are keyed by video ID and shared by all sessions. Each job remembers
+    which sessions asked for it and is cancelled once all of them have
+    deselected the video; finished links are kept until they expire.
+    """
+
+    def __init__(self, workers=PREFETCH_WORKERS, per_session=MAX_PREFETCH_PER_SESSION):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='conversion-prefetch')
+        self.per_session = per_session
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    def _usable(self, job):
+        """False once a job has failed or its link has expired"""
+        if not job['future'].done():
+            return True
+        if job['future'].cancelled() or job['future'].exception() is not None:
+            return False
+        result = job['future'].result()
+        return result['status'] == 'ok' and result['expires_at'] > time.time()
+
+    def _prune(self):
+        for video_id in [v for v, job in self.jobs.items() if not self._usable(job)]:
+            del self.jobs[video_id]
+
+    def prefetch(self, video_id, owner, max_attempts=None):
+        """Start converting a video for a session; False if the session is at its cap"""
+        with self.lock:
+            self._prune()
+            job = self.jobs.get(video_id)
+            if job:
+                job['owners'].add(owner)
+                return True
+            in_flight = sum(
+                1 for job in self.jobs.values()
+                if owner in job['owners'] and not job['future'].done()
+            )
+            if in_flight >= self.per_session:
+                return False
+            cancelled = threading.Event()
+            self.jobs[video_id] = {
+                'owners': {owner},
+                'cancelled': cancelled,
+                'future': self.executor.submit(
+                    poll_conversion, video_id, cancelled=cancelled, max_attempts=max_attempts
+                )
+            }
+        return True
+
+    def cancel(self, video_id, owner):
+        """Drop a session's interest in a video, stopping its conversion if nobody else wants it"""
+        with self.lock:
+            job = self.jobs.get(video_id)
+            if job is None:
+                return
+            job['owners'].discard(owner)
+            if not job['owners'] and not job['future'].done():
+                job['cancelled'].set()
+                job['future'].cancel()
+                del self.jobs[video_id]
+
+    def status(self, video_id):
+        """'converting', 'ready' or None when there is no usable prefetch"""
+        with self.lock:
+            job = self.jobs.get(video_id)
+            if job is None or not self._usable(job):
+                return None
+            return 'ready' if job['future'].done() else 'converting'
+
+    def link(self, video_id, timeout=LINK_WAIT):
+        """Prefetched download link, waiting up to `timeout` for a running conversion; None if unavailable
+
+        A job still queued behind other sessions' conversions is cancelled,
+        so the caller polls inline instead of waiting for a free worker.
+        """
+        with self.lock:
+            job = self.jobs.get(video_id)
+            if job is None:
+                return None
+            if job['future'].cancel():
+                job['cancelled'].set()
+                del self.jobs[video_id]
+                return None
+        try:
+            result = job['future'].result(timeout)
+        except Exception:
+            return None
+        if result['status'] != 'ok' or result['expires_at'] <= time.time():
+            return None
+        return result['link']
+
+@st.cache_resource
+def get_conversion_prefetcher():
+    """Process-wide conversion prefetcher"""
+    return ConversionPrefetcher()
@@ -0,0 +1,226 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+import threading
+import time
+import streamlit as st
+from settings import get_settings, on_reload
+from knowledge_base import KnowledgeBase, canonical_name
+
+DEFAULT_SUBGRAPH_LIMIT = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    canonical TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS relationships (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES entities(id),
+    target_id INTEGER NOT NULL REFERENCES entities(id),
+    relationship TEXT NOT NULL,
+    description TEXT NOT NULL,
+    UNIQUE (source_id, relationship, target_id)
+);
+CREATE INDEX IF NOT EXISTS idx_relationships_target ON relationships(target_id);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    canonical_keyword TEXT NOT NULL,
+    language TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_keyword ON runs(canonical_keyword);
+CREATE TABLE IF NOT EXISTS run_videos (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    video_url TEXT NOT NULL,
+    PRIMARY KEY (run_id, video_url)
+);
+CREATE TABLE IF NOT EXISTS provenance (
+    relationship_id INTEGER NOT NULL REFERENCES relationships(id),
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    PRIMARY KEY (relationship_id, run_id)
+);
+CREATE INDEX IF NOT EXISTS idx_provenance_run ON provenance(run_id);
+"""
+
+class GraphStore:
+    """Persistent SQLite knowledge graph accumulated across research runs
+
+    Entities are canonicalized by case and whitespace, relationships are
+    unique per (source, type, target) and every relationship records which
+    runs (keyword, language, video URLs, timestamp) produced it.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _entity_id(self, conn, name, cache):
+        canonical = canonical_name(name)
+        entity_id = cache.get(canonical)
+        if entity_id is None:
+            conn.execute(
+                "INSERT INTO entities (canonical, name) VALUES (?, ?) ON CONFLICT(canonical) DO NOTHING",
+                (canonical, " ".join(name.split()))
+            )
+            entity_id = conn.execute(
+                "SELECT id FROM entities WHERE canonical = ?", (canonical,)
+            ).fetchone()[0]
+            cache[canonical] = entity_id
+        return entity_id
+
+    def upsert(self, kb, keyword, language=None, video_urls=()):
+        """Merge a KnowledgeBase into the store and return the new run id"""
+        with self.lock, self._connect() as conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (keyword, canonical_keyword, language, created_at) VALUES (?, ?, ?, ?)",
+                (keyword, canonical_name(keyword), language, time.strftime('%Y-%m-%d %H:%M:%S'))
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO run_videos VALUES (?, ?)",
+                [(run_id, url) for url in video_urls]
+            )
+
+            entity_ids = {}
+            for rel in kb.relationships:
+                source_id = self._entity_id(conn, rel['entity'], entity_ids)
+                target_id = self._entity_id(conn, rel['attribute'], entity_ids)
+                relationship = canonical_name(rel['relationship'])
+                conn.execute(
+                    """INSERT INTO relationships (source_id, target_id, relationship, description)
+                       VALUES (?, ?, ?, ?)
+                       ON CONFLICT(source_id, relationship, target_id) DO NOTHING""",
+                    (source_id, target_id, relationship, rel['description'])
+                )
+                relationship_id = conn.execute(
+                    "SELECT id FROM relationships WHERE source_id = ? AND relationship = ? AND target_id = ?",
+                    (source_id, relationship, target_id)
+                ).fetchone()[0]
+                conn.execute("INSERT OR IGNORE INTO provenance VALUES (?, ?)", (relationship_id, run_id))
+        return run_id
+
+    def _to_knowledge_base(self, rows, keywords):
+        kb = KnowledgeBase(keywords)
+        for entity, relationship, attribute, description in rows:
+            kb.add_relationship({
+                'entity': entity,
+                'relationship': relationship,
+                'attribute': attribute,
+                'description': description
+            })
+        return kb.finalize()
+
+    def query_keyword(self, keyword, limit=DEFAULT_SUBGRAPH_LIMIT):
+        """Subgraph of relationships produced by runs for a keyword"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT s.name, r.relationship, t.name, r.description
+                FROM runs
+                JOIN provenance p ON p.run_id = runs.id
+                JOIN relationships r ON r.id = p.relationship_id
+                JOIN entities s ON s.id = r.source_id
+                JOIN entities t ON t.id = r.target_id
+                WHERE runs.canonical_keyword = ?
+                GROUP BY r.id
+                LIMIT ?
+            """, (canonical_name(keyword), limit)).fetchall()
+            return self._to_knowledge_base(rows, keyword)
+
+    def query_neighborhood(self, entity, hops=1, limit=DEFAULT_SUBGRAPH_LIMIT):
+        """Subgraph within `hops` relationships of an entity, or None if unknown"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, name FROM entities WHERE canonical = ?", (canonical_name(entity),)
+            ).fetchone()
+            if row is None:
+                return None
+
+            # Expand the frontier one hop at a time using the source/target indexes
+            seen, frontier, relationship_ids = {row[0]}, {row[0]}, set()
+            for _ in range(hops):
+                if not frontier or len(relationship_ids) >= limit:
+                    break
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS frontier (id INTEGER PRIMARY KEY)")
+                conn.execute("DELETE FROM frontier")
+                conn.executemany("INSERT INTO frontier VALUES (?)", [(i,) for i in frontier])
+                edges = conn.execute("""
+                    SELECT id, source_id, target_id FROM relationships
+                    WHERE source_id IN (SELECT id FROM frontier)
+                    UNION
+                    SELECT id, source_id, target_id FROM relationships
+                    WHERE target_id IN (SELECT id FROM frontier)
+                    LIMIT ?
+                """, (limit - len(relationship_ids),)).fetchall()
+                next_frontier = set()
+                for relationship_id, source_id, target_id in edges:
+                    relationship_ids.add(relationship_id)
+                    next_frontier.update((source_id, target_id))
+                frontier = next_frontier - seen
+                seen |= next_frontier
+
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS selected (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM selected")
+            conn.executemany("INSERT INTO selected VALUES (?)", [(i,) for i in relationship_ids])
+            rows = conn.execute("""
+                SELECT s.name, r.relationship, t.name, r.description
+                FROM selected
+                JOIN relationships r ON r.id = selected.id
+                JOIN entities s ON s.id = r.source_id
+                JOIN entities t ON t.id = r.target_id
+            """).fetchall()
+            return self._to_knowledge_base(rows, row[1])
+
+    def keywords(self):
+        """Keywords of all stored runs, most recent first"""
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute(
+                "SELECT keyword FROM runs GROUP BY canonical_keyword ORDER BY MAX(id) DESC"
+            )]
+
+    def provenance(self, keyword):
+        """Runs and video URLs stored for a keyword"""
+        with self._connect() as conn:
+            runs = conn.execute(
+                "SELECT id, language, created_at FROM runs WHERE canonical_keyword = ? ORDER BY id DESC",
+                (canonical_name(keyword),)
+            ).fetchall()
+            return [{
+                'language': language,
+                'created_at': created_at,
+                'video_urls': [r[0] for r in conn.execute(
+                    "SELECT video_url FROM run_videos WHERE run_id = ?", (run_id,)
+                )]
+            } for run_id, language, created_at in runs]
+
+    def stats(self):
+        """Entity, relationship and run counts"""
+        with self._connect() as conn:
+            return {
+                table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('entities', 'relationships', 'runs')
+            }
+
+@st.cache_resource
+def get_graph_store():
+    """Process-wide graph store"""
+    return GraphStore(get_settings()['graph_store_path'])
+
+on_reload(get_graph_store.clear)
@@ -0,0 +1,166 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+from settings import get_settings, get_http_session, rapidapi_headers
+from metrics import get_metrics
+from scheduling import annotate_result
+
+MAX_VIDEOS_PER_SOURCE = 200
+FETCH_WORKERS = 4
+
+# A playlist or channel is paged until this many pages, in case the API keeps
+# returning continuation tokens
+MAX_PAGES = 50
+
+_VIDEO_ID = re.compile(r'^[0-9A-Za-z_-]{11}$')
+_CHANNEL_ID = re.compile(r'^UC[0-9A-Za-z_-]{22}$')
+_YOUTUBE_HOSTS = ('youtube.com', 'youtube-nocookie.com')
+
+def _host_in(host, domains):
+    """Whether host is one of the domains or a subdomain of one"""
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+def _valid_video_id(value):
+    return value if value and _VIDEO_ID.match(value) else None
+
+def parse_youtube_url(url):
+    """What a YouTube link points to: ('video', id), ('playlist', id), ('channel', params) or None
+
+    For channels, params are the yt-api query parameters that identify it:
+    {'id': ...} for /channel/UC... links and {'forUsername': ...} for @handles.
+    A watch link inside a playlist counts as the video.
+    """
+    url = url.strip()
+    if not url:
+        return None
+    if _VIDEO_ID.match(url):
+        return ('video', url)
+    if _CHANNEL_ID.match(url):
+        return ('channel', {'id': url})
+    if url.startswith('@'):
+        return ('channel', {'forUsername': url})
+    if '://' not in url:
+        url = 'https://' + url
+
+    parsed = urlparse(url)
+    host = parsed.hostname or ''
+    parts = [p for p in parsed.path.split('/') if p]
+    query = parse_qs(parsed.query)
+
+    if _host_in(host, ('youtu.be',)):
+        video_id = _valid_video_id(parts[0] if parts else None)
+        return ('video', video_id) if video_id else None
+    if not _host_in(host, _YOUTUBE_HOSTS):
+        return None
+
+    video_id = _valid_video_id(query.get('v', [None])[0])
+    if video_id:
+        return ('video', video_id)
+    if parts and parts[0] in ('shorts', 'embed', 'live', 'v', 'e') and len(parts) > 1:
+        video_id = _valid_video_id(parts[1])
+        return ('video', video_id) if video_id else None
+    if query.get('list'):
+        return ('playlist', query['list'][0])
+    if parts and parts[0].startswith('@'):
+        return ('channel', {'forUsername': parts[0]})
+    if len(parts) > 1 and parts[0] == 'channel' and _CHANNEL_ID.match(parts[1]):
+        return ('channel', {'id': parts[1]})
+    return None
+
+def extract_video_id(url):
+    """Video ID from a watch, youtu.be, shorts, embed or live link, or a bare ID"""
+    target = parse_youtube_url(url)
+    if target and target[0] == 'video':
+        return target[1]
+    return None
+
+def _fetch_pages(path, params, limit):
+    """Items from a paged yt-api list endpoint, following continuation tokens up to limit videos"""
+    url = f"{get_settings()['yt_api_base_url']}{path}"
+    headers = rapidapi_headers('yt_rapidapi_host')
+    session = get_http_session()
+    metrics = get_metrics()
+    items, token = [], None
+    for _ in range(MAX_PAGES):
+        page_params = dict(params, token=token) if token else params
+        with metrics.span('playlist'):
+            response = session.get(url, headers=headers, params=page_params)
+        if response.status_code != 200:
+            metrics.error('playlist', f"http_{response.status_code}")
+            raise RuntimeError(f"yt-api returned HTTP {response.status_code}")
+        page = response.json()
+        items.extend(item for item in page.get('data', []) if item.get('videoId'))
+        token = page.get('continuation')
+        if not token or len(items) >= limit:
+            break
+    return items[:limit]
+
+def fetch_source(target, limit=MAX_VIDEOS_PER_SOURCE):
+    """Videos of a parsed playlist or channel, newest channel uploads first"""
+    kind, value = target
+    if kind == 'playlist':
+        return _fetch_pages('/playlist', {'id': value}, limit)
+    return _fetch_pages('/channel/videos', dict(value, sort_by='newest'), limit)
+
+def _video_entry(item):
+    annotate_result(item)
+    return {
+        'url': f"https://youtube.com/watch?v={item['videoId']}",
+        'title': item.get('title') or item['videoId'],
+        'video_id': item['videoId'],
+        'duration_seconds': item['duration_seconds'],
+        'view_count': item['view_count']
+    }
+
+def _try_fetch(target, limit):
+    try:
+        return fetch_source(target, limit), None
+    except Exception as e:
+        return None, str(e)
+
+def expand_urls(urls, limit=MAX_VIDEOS_PER_SOURCE, workers=FETCH_WORKERS):
+    """Basket entries for a list of video, playlist and channel links
+
+    Playlists and channels are fetched concurrently, each paged up to `limit`
+    videos. Returns (videos, errors): videos deduplicated by ID in input
+    order, and (url, message) pairs for links that could not be used.
+    """
+    targets, errors = [], []
+    for url in urls:
+        target = parse_youtube_url(url)
+        if target is None:
+            if url.strip():
+                errors.append((url, "Not a YouTube video, playlist or channel link"))
+        else:
+            targets.append((url, target))
+
+    lists = {url: target for url, target in targets if target[0] != 'video'}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(lists)))) as pool:
+        fetched = dict(zip(lists, pool.map(lambda target: _try_fetch(target, limit), lists.values())))
+
+    videos, seen = [], set()
+    for url, (kind, value) in targets:
+        if kind == 'video':
+            entries = [{'url': f"https://youtube.com/watch?v={value}", 'title': value, 'video_id': value}]
+        else:
+            items, error = fetched[url]
+            if error:
+                errors.append((url, error))
+                continue
+            entries = [_video_entry(item) for item in items]
+        for entry in entries:
+            if entry['video_id'] not in seen:
+                seen.add(entry['video_id'])
+                videos.append(entry)
+    return videos, errors
+
+def add_to_basket(basket, videos):
+    """Append videos whose IDs are not already in the basket; returns how many were added"""
+    seen = {video.get('video_id') or extract_video_id(video['url']) for video in basket}
+    added = 0
+    for video in videos:
+        if video['video_id'] not in seen:
+            seen.add(video['video_id'])
+            basket.append(video)
+            added += 1
+    return added
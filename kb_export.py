@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+import os
+import threading
+from xml.sax.saxutils import escape
+from settings import get_settings
+
+MAX_CACHED_EXPORTS = 20
+BATCH_SIZE = 1000
+
+_lock = threading.Lock()
+
+def iter_markdown(kb):
+    """Stream the knowledge base as a Markdown document"""
+    yield "# Knowledge Base\n\n"
+
+    # Add keywords section
+    yield "## Keywords\n"
+    yield ", ".join(kb.keywords.split(", ")) + "\n\n"
+
+    # Add relationships section
+    yield "## Relationships\n\n"
+    for rel in kb.relationships:
+        yield (
+            f"### {rel['entity']}\n"
+            f"- {rel['relationship']} {rel['attribute']}\n"
+            f"- Description: {rel['description']}\n\n"
+        )
+
+    # Add headings section
+    yield "## Document Structure\n\n"
+    for heading in kb.headings:
+        prefix = "#" * (int(heading['heading'][1]) + 1)
+        yield f"{prefix} {heading['value']}\n"
+
+def iter_json(kb):
+    """Stream the knowledge base as the [keywords, relationships, headings] array
+
+    This is the same layout the KB workflow returns, so exports can be
+    uploaded back into the viewer.
+    """
+    yield "[\n  " + json.dumps(kb.keywords) + ",\n  ["
+    for i, rel in enumerate(kb.relationships):
+        yield ("," if i else "") + "\n    " + json.dumps(rel)
+    yield "\n  ],\n  " + json.dumps(kb.headings) + "\n]\n"
+
+def iter_jsonl(kb):
+    """Stream one relationship per line"""
+    for rel in kb.relationships:
+        yield json.dumps(rel) + "\n"
+
+def iter_csv(kb):
+    """Stream relationships as CSV, one batch of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['entity', 'relationship', 'attribute', 'description'])
+    for i, rel in enumerate(kb.relationships, 1):
+        writer.writerow([rel['entity'], rel['relationship'], rel['attribute'], rel['description']])
+        if i % BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def iter_graphml(kb):
+    """Stream the knowledge graph as GraphML, one node per distinct name"""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+        '  <key id="relationship" for="edge" attr.name="relationship" attr.type="string"/>\n'
+        '  <key id="description" for="edge" attr.name="description" attr.type="string"/>\n'
+        '  <graph id="knowledge_base" edgedefault="directed">\n'
+    )
+    used = set(kb.entity.tolist()) | set(kb.attribute.tolist())
+    for code in sorted(used):
+        yield f'    <node id="n{code}"><data key="label">{escape(kb.names.strings[code])}</data></node>\n'
+    for i, rel in enumerate(kb.relationships):
+        yield (
+            f'    <edge id="e{i}" source="n{kb.entity[i]}" target="n{kb.attribute[i]}">'
+            f'<data key="relationship">{escape(rel["relationship"])}</data>'
+            f'<data key="description">{escape(rel["description"])}</data></edge>\n'
+        )
+    yield '  </graph>\n</graphml>\n'
+
+EXPORT_FORMATS = {
+    'markdown': {'label': "Markdown", 'extension': 'md', 'mime': 'text/markdown', 'writer': iter_markdown},
+    'json': {'label': "JSON", 'extension': 'json', 'mime': 'application/json', 'writer': iter_json},
+    'jsonl': {'label': "JSON Lines", 'extension': 'jsonl', 'mime': 'application/jsonl', 'writer': iter_jsonl},
+    'csv': {'label': "CSV", 'extension': 'csv', 'mime': 'text/csv', 'writer': iter_csv},
+    'graphml': {'label': "GraphML", 'extension': 'graphml', 'mime': 'application/graphml+xml', 'writer': iter_graphml}
+}
+
+def cached_export_path(kb, fmt, export_dir=None):
+    """Path of the cached export for this KB and format (may not exist yet)"""
+    export_dir = export_dir or get_settings()['export_dir']
+    return os.path.join(export_dir, f"{kb.content_hash}.{EXPORT_FORMATS[fmt]['extension']}")
+
+def _evict(export_dir, keep):
+    """Remove the least recently used exports beyond MAX_CACHED_EXPORTS
+
+    Exports are never modified after they are written, so their mtime is set
+    on every use and records it; atime is not updated on noatime or relatime
+    mounts.
+    """
+    paths = [os.path.join(export_dir, name) for name in os.listdir(export_dir)]
+    paths = sorted((p for p in paths if os.path.isfile(p)), key=os.path.getmtime, reverse=True)
+    for path in paths[MAX_CACHED_EXPORTS:]:
+        if path != keep:
+            os.remove(path)
+
+def export_knowledge_base(kb, fmt, export_dir=None):
+    """Write the export to the on-disk cache if needed and return its path
+
+    The document is streamed to a temporary file and renamed into place, so
+    the full export is never held in memory and a partial file is never
+    served.
+    """
+    export_dir = export_dir or get_settings()['export_dir']
+    path = cached_export_path(kb, fmt, export_dir)
+    with _lock:
+        if os.path.exists(path):
+            # Mark as used for _evict
+            os.utime(path)
+            return path
+        os.makedirs(export_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in EXPORT_FORMATS[fmt]['writer'](kb):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+        _evict(export_dir, keep=path)
+    return path
+
+def read_export(kb, fmt, export_dir=None):
+    """Contents of the export, rewriting it if it was evicted; for deferred downloads"""
+    with open(export_knowledge_base(kb, fmt, export_dir), 'rb') as f:
+        return f.read()
@@ -0,0 +1,232 @@
+import codecs
+import json
+import re
+from knowledge_base import KnowledgeBase
+
+CHUNK_SIZE = 1 << 20
+MAX_ERRORS = 20
+RELATIONSHIP_FIELDS = ('entity', 'relationship', 'attribute', 'description')
+HEADING_PATTERN = re.compile(r'^h[1-6]$')
+
+class KnowledgeBaseFormatError(ValueError):
+    """Raised when a knowledge base document is structurally invalid"""
+
+    def __init__(self, message, offset=None):
+        if offset is not None:
+            message = f"{message} (at character {offset})"
+        super().__init__(message)
+        self.offset = offset
+
+class _JSONStream:
+    """Incremental reader over a JSON document, decoding one value at a time"""
+
+    def __init__(self, fileobj, chunk_size=CHUNK_SIZE):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.base = 0
+        self.eof = False
+
+    @property
+    def offset(self):
+        return self.base + self.pos
+
+    def _fill(self):
+        """Read the next chunk into the buffer; returns False at end of input"""
+        if self.eof:
+            return False
+        chunk = self.fileobj.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        text = self.decoder.decode(chunk, final=not chunk) if isinstance(chunk, bytes) else chunk
+
+        # Drop the consumed prefix so the buffer stays around one chunk
+        if self.pos:
+            self.base += self.pos
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += text
+        return not self.eof
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill() and self.pos >= len(self.buffer):
+                return ''
+
+    def expect(self, chars):
+        """Consume one of the given structural characters"""
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else "end of file"
+            raise KnowledgeBaseFormatError(
+                f"Expected {' or '.join(repr(c) for c in chars)}, found {found}", self.offset
+            )
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+                # A value ending exactly at the buffer edge may be a truncated number
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise KnowledgeBaseFormatError(e.msg, self.base + e.pos)
+            self._fill()
+
+    def array(self):
+        """Iterate over the elements of an array, yielding each element's offset
+
+        The caller must consume exactly one value per yielded offset.
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.offset
+            if self.expect(',]') == ']':
+                return
+
+def validate_relationship(record):
+    """Return an error message for an invalid relationship record, or None"""
+    if not isinstance(record, dict):
+        return f"expected an object, got {type(record).__name__}"
+    for field in RELATIONSHIP_FIELDS:
+        if field not in record:
+            return f"missing field '{field}'"
+        if not isinstance(record[field], str):
+            return f"field '{field}' must be a string"
+    return None
+
+def validate_heading(record):
+    """Return an error message for an invalid heading record, or None"""
+    if not isinstance(record, dict):
+        return f"expected an object, got {type(record).__name__}"
+    if not isinstance(record.get('heading'), str) or not HEADING_PATTERN.match(record['heading']):
+        return "field 'heading' must be one of h1-h6"
+    if not isinstance(record.get('value'), str):
+        return "field 'value' must be a string"
+    return None
+
+class _Report:
+    """Collects validation errors, keeping only the first max_errors"""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.errors = []
+        self.invalid = 0
+
+    def add(self, section, index, offset, message):
+        self.invalid += 1
+        if len(self.errors) < self.max_errors:
+            error = {'section': section, 'index': index, 'message': message}
+            if offset is not None:
+                error['offset'] = offset
+            self.errors.append(error)
+
+    def as_dict(self, records):
+        return {'records': records, 'invalid': self.invalid, 'errors': self.errors}
+
+def load_knowledge_base(fileobj, max_errors=MAX_ERRORS, chunk_size=CHUNK_SIZE):
+    """Stream-parse a knowledge base JSON document
+
+    The document is a three-element array of keywords, relationships and
+    headings. Relationships and headings are decoded and validated one record
+    at a time straight into a KnowledgeBase; invalid records are skipped and
+    reported. Returns the KnowledgeBase and a report with the record count,
+    the number of invalid records and the first `max_errors` errors with
+    their positions. Raises KnowledgeBaseFormatError if the document
+    structure itself is invalid.
+    """
+    stream = _JSONStream(fileobj, chunk_size)
+    report = _Report(max_errors)
+    kb = KnowledgeBase()
+    records = 0
+
+    sections = stream.array()
+    if next(sections, None) is None:
+        raise KnowledgeBaseFormatError("Expected [keywords, relationships, headings], got an empty array")
+
+    keywords_offset = stream.offset
+    kb.keywords = stream.value()
+    if not isinstance(kb.keywords, str):
+        raise KnowledgeBaseFormatError("Keywords must be a string", keywords_offset)
+
+    if next(sections, None) is None:
+        raise KnowledgeBaseFormatError("Missing relationships array", stream.offset)
+    if stream.peek() != '[':
+        raise KnowledgeBaseFormatError("Relationships must be an array", stream.offset)
+    for index, offset in enumerate(stream.array()):
+        record = stream.value()
+        records += 1
+        error = validate_relationship(record)
+        if error:
+            report.add('relationships', index, offset, error)
+        else:
+            kb.add_relationship(record)
+
+    if next(sections, None) is None:
+        raise KnowledgeBaseFormatError("Missing headings array", stream.offset)
+    if stream.peek() != '[':
+        raise KnowledgeBaseFormatError("Headings must be an array", stream.offset)
+    for index, offset in enumerate(stream.array()):
+        record = stream.value()
+        error = validate_heading(record)
+        if error:
+            report.add('headings', index, offset, error)
+        else:
+            kb.headings.append({'heading': record['heading'], 'value': record['value']})
+
+    if next(sections, None) is not None:
+        raise KnowledgeBaseFormatError("Expected exactly three top-level elements", stream.offset)
+    if stream.peek():
+        raise KnowledgeBaseFormatError("Unexpected data after the top-level array", stream.offset)
+
+    return kb.finalize(), report.as_dict(records)
+
+def parse_knowledge_base(content, max_errors=MAX_ERRORS):
+    """Validate an already decoded knowledge base (list or dict form)
+
+    Accepts the [keywords, relationships, headings] list returned by the KB
+    workflow or a dict with those keys, and returns the same (kb, report)
+    pair as load_knowledge_base.
+    """
+    if isinstance(content, dict):
+        content = [content.get('keywords'), content.get('relationships'), content.get('headings')]
+    if not isinstance(content, list) or len(content) != 3:
+        raise KnowledgeBaseFormatError("Expected [keywords, relationships, headings]")
+    keywords, relationships, headings = content
+    if not isinstance(keywords, str):
+        raise KnowledgeBaseFormatError("Keywords must be a string")
+    if not isinstance(relationships, list) or not isinstance(headings, list):
+        raise KnowledgeBaseFormatError("Relationships and headings must be arrays")
+
+    report = _Report(max_errors)
+    kb = KnowledgeBase(keywords)
+    for index, record in enumerate(relationships):
+        error = validate_relationship(record)
+        if error:
+            report.add('relationships', index, None, error)
+        else:
+            kb.add_relationship(record)
+    for index, record in enumerate(headings):
+        error = validate_heading(record)
+        if error:
+            report.add('headings', index, None, error)
+        else:
+            kb.headings.append({'heading': record['heading'], 'value': record['value']})
+    return kb.finalize(), report.as_dict(len(relationships))
@@ -0,0 +1,217 @@
+import hashlib
+import numpy as np
+
+RELATIONSHIP_FIELDS = ('entity', 'relationship', 'attribute', 'description')
+
+def canonical_name(name):
+    """Normalize case and whitespace so spelling variants share one node"""
+    return " ".join(str(name).split()).casefold()
+
+class StringTable:
+    """Interned string table mapping each distinct string to an integer code"""
+
+    def __init__(self):
+        self.strings = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.codes[value] = code
+            self.strings.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.strings)
+
+class RelationshipView:
+    """Read-only sequence of relationship dicts decoded from a KnowledgeBase"""
+
+    def __init__(self, kb):
+        self.kb = kb
+
+    def __len__(self):
+        return len(self.kb)
+
+    def __getitem__(self, index):
+        return self.kb.row(index)
+
+    def __iter__(self):
+        names = self.kb.names.strings
+        descriptions = self.kb.descriptions.strings
+        columns = (self.kb.entity, self.kb.relationship, self.kb.attribute, self.kb.description)
+        for e, r, a, d in zip(*(np.asarray(c).tolist() for c in columns)):
+            yield {
+                'entity': names[e],
+                'relationship': names[r],
+                'attribute': names[a],
+                'description': descriptions[d]
+            }
+
+class KnowledgeBase:
+    """Columnar knowledge base built once per loaded or generated KB
+
+    Entity, relationship and attribute strings share one interned table and
+    descriptions have their own; each relationship is stored as four integer
+    codes. Call finalize() after the last add_relationship() to pack the
+    columns into NumPy arrays.
+    """
+
+    def __init__(self, keywords='', headings=None):
+        self.keywords = keywords
+        self.headings = headings if headings is not None else []
+        self.names = StringTable()
+        self.descriptions = StringTable()
+        self.entity = []
+        self.relationship = []
+        self.attribute = []
+        self.description = []
+        self._hash = None
+        self._frame = None
+        self._lower = {}
+        self._sort_orders = {}
+
+    def __getstate__(self):
+        """Pickle without the lowercase, frame and sort caches, which are rebuilt on demand"""
+        return dict(self.__dict__, _frame=None, _lower={}, _sort_orders={})
+
+    @classmethod
+    def from_dict(cls, kb):
+        """Build from a dict with keywords, relationships and headings"""
+        compact = cls(kb['keywords'], list(kb['headings']))
+        for rel in kb['relationships']:
+            compact.add_relationship(rel)
+        return compact.finalize()
+
+    def add_relationship(self, rel):
+        """Append one relationship record"""
+        self.entity.append(self.names.code(rel['entity']))
+        self.relationship.append(self.names.code(rel['relationship']))
+        self.attribute.append(self.names.code(rel['attribute']))
+        self.description.append(self.descriptions.code(rel['description']))
+
+    def finalize(self):
+        """Pack the code columns into int32 arrays"""
+        for column in RELATIONSHIP_FIELDS:
+            setattr(self, column, np.asarray(getattr(self, column), dtype=np.int32))
+        return self
+
+    def __len__(self):
+        return len(self.entity)
+
+    def row(self, index):
+        """Decode one relationship into a dict"""
+        return {
+            'entity': self.names.strings[self.entity[index]],
+            'relationship': self.names.strings[self.relationship[index]],
+            'attribute': self.names.strings[self.attribute[index]],
+            'description': self.descriptions.strings[self.description[index]]
+        }
+
+    @property
+    def relationships(self):
+        return RelationshipView(self)
+
+    @property
+    def content_hash(self):
+        """SHA-256 of the KB contents, computed once"""
+        if self._hash is None:
+            digest = hashlib.sha256()
+            digest.update(self.keywords.encode('utf-8'))
+            for table in (self.names, self.descriptions):
+                digest.update(b'\0'.join(s.encode('utf-8') for s in table.strings))
+                digest.update(b'\1')
+            for column in RELATIONSHIP_FIELDS:
+                digest.update(np.asarray(getattr(self, column), dtype=np.int32).tobytes())
+            for heading in self.headings:
+                digest.update(f"{heading['heading']}\t{heading['value']}\n".encode('utf-8'))
+            self._hash = digest.hexdigest()
+        return self._hash
+
+    def to_dataframe(self):
+        """Relationships as a DataFrame of categoricals sharing the string tables"""
+        if self._frame is None:
+            import pandas as pd
+            names = pd.Index(self.names.strings)
+            descriptions = pd.Index(self.descriptions.strings)
+            self._frame = pd.DataFrame({
+                'entity': pd.Categorical.from_codes(self.entity, categories=names),
+                'relationship': pd.Categorical.from_codes(self.relationship, categories=names),
+                'attribute': pd.Categorical.from_codes(self.attribute, categories=names),
+                'description': pd.Categorical.from_codes(self.description, categories=descriptions)
+            })
+        return self._frame
+
+    def _lowercase(self, table):
+        """Lowercased copy of a string table, built once for text search"""
+        key = id(table)
+        if key not in self._lower:
+            self._lower[key] = [value.casefold() for value in table.strings]
+        return self._lower[key]
+
+    def _table(self, column):
+        return self.descriptions if column == 'description' else self.names
+
+    def matching_codes(self, column, text):
+        """Codes of the column's distinct strings containing text (case-insensitive)"""
+        text = text.casefold()
+        return np.array(
+            [code for code, value in enumerate(self._lowercase(self._table(column))) if text in value],
+            dtype=np.int32
+        )
+
+    def relationship_types(self):
+        """Sorted distinct relationship types"""
+        return sorted(self.names.strings[code] for code in np.unique(self.relationship))
+
+    def sort_order(self, column):
+        """Row indices ordered by a column's string value, computed once per column"""
+        if column not in self._sort_orders:
+            table = self._table(column)
+            # Rank each distinct string once, then order rows by their string's rank
+            ranks = np.empty(len(table), dtype=np.int32)
+            ranks[np.argsort(np.array(self._lowercase(table), dtype=object), kind='stable')] = np.arange(len(table))
+            self._sort_orders[column] = np.argsort(ranks[getattr(self, column)], kind='stable')
+        return self._sort_orders[column]
+
+    def query(self, entity='', relationship_types=(), description='', sort_by=None, descending=False):
+        """Return indices of rows matching all filters, optionally sorted
+
+        `entity` matches entity names by substring, `relationship_types` by
+        exact type and `description` by substring, all case-insensitive.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if entity:
+            mask &= np.isin(self.entity, self.matching_codes('entity', entity))
+        if relationship_types:
+            codes = [self.names.codes[t] for t in relationship_types if t in self.names.codes]
+            mask &= np.isin(self.relationship, codes)
+        if description:
+            mask &= np.isin(self.description, self.matching_codes('description', description))
+
+        if sort_by:
+            order = self.sort_order(sort_by)
+            rows = order[mask[order]]
+            return rows[::-1] if descending else rows
+        return np.flatnonzero(mask)
+
+    def rows_frame(self, rows):
+        """Decode only the given rows into a DataFrame of plain strings"""
+        import pandas as pd
+        names = self.names.strings
+        descriptions = self.descriptions.strings
+        return pd.DataFrame({
+            'entity': [names[c] for c in self.entity[rows].tolist()],
+            'relationship': [names[c] for c in self.relationship[rows].tolist()],
+            'attribute': [names[c] for c in self.attribute[rows].tolist()],
+            'description': [descriptions[c] for c in self.description[rows].tolist()]
+        })
+
+    def to_dict(self):
+        """Plain dict form, as accepted by from_dict"""
+        return {
+            'keywords': self.keywords,
+            'relationships': list(self.relationships),
+            'headings': self.headings
+        }
@@ -0,0 +1,282 @@
+import hashlib
+from knowledge_base import canonical_name
+
+# networkx is imported inside the functions that need it, so pages that only
+# import the constants below do not pay for it on cold start
+
+ENTITY_COLOR = "#00ff1e"
+ATTRIBUTE_COLOR = "#ff9999"
+COMMUNITY_COLOR = "#97c2fc"
+
+# Node/edge budget that keeps the vis.js page interactive
+DEFAULT_MAX_NODES = 300
+DEFAULT_MAX_EDGES = 1000
+
+# Kamada-Kawai gives nicer layouts but is quadratic in memory; above this many
+# nodes fall back to the (sparse, seeded) Fruchterman-Reingold spring layout
+KAMADA_KAWAI_MAX_NODES = 200
+LAYOUT_SEED = 42
+
+REDUCTION_MODES = {
+    'full': "All nodes",
+    'degree': "Top nodes by degree",
+    'pagerank': "Top nodes by PageRank",
+    'communities': "Communities as super-nodes"
+}
+
+def build_graph(relationships):
+    """Build a directed graph from KB relationships, collapsing case variants
+
+    Nodes are keyed by canonical name and labelled with their most frequent
+    spelling. Repeated entity/attribute pairs become one edge whose weight
+    counts the occurrences and whose `relationships` maps each relationship
+    type to its description.
+    """
+    import networkx as nx
+    graph = nx.DiGraph()
+    spellings = {}
+
+    def add_node(name, is_entity):
+        key = canonical_name(name)
+        counts = spellings.setdefault(key, {})
+        counts[name] = counts.get(name, 0) + 1
+        if key not in graph:
+            graph.add_node(key, is_entity=is_entity)
+        elif is_entity:
+            graph.nodes[key]['is_entity'] = True
+        return key
+
+    for rel in relationships:
+        source = add_node(rel['entity'], True)
+        target = add_node(rel['attribute'], False)
+        if graph.has_edge(source, target):
+            data = graph.edges[source, target]
+            data['weight'] += 1
+            data['relationships'].setdefault(rel['relationship'], rel['description'])
+        else:
+            graph.add_edge(
+                source, target, weight=1,
+                relationships={rel['relationship']: rel['description']}
+            )
+
+    for key, counts in spellings.items():
+        label = max(counts, key=counts.get)
+        graph.nodes[key]['label'] = label
+        graph.nodes[key]['title'] = label
+        graph.nodes[key]['color'] = ENTITY_COLOR if graph.nodes[key]['is_entity'] else ATTRIBUTE_COLOR
+    return graph
+
+def relationship_types(graph):
+    """Sorted list of relationship types present in the graph"""
+    types = set()
+    for _, _, data in graph.edges(data=True):
+        types.update(data['relationships'])
+    return sorted(types)
+
+def filter_relationships(graph, types):
+    """Keep only edges having one of the given relationship types"""
+    types = set(types)
+    edges = [
+        (u, v) for u, v, data in graph.edges(data=True)
+        if types.intersection(data['relationships'])
+    ]
+    return graph.edge_subgraph(edges)
+
+def undirected_graph(graph):
+    """Undirected copy of a KB graph with only edge weights, summed over both directions"""
+    import networkx as nx
+    undirected = nx.Graph()
+    undirected.add_nodes_from(graph)
+    for u, v, weight in graph.edges(data='weight', default=1):
+        if undirected.has_edge(u, v):
+            undirected.edges[u, v]['weight'] += weight
+        else:
+            undirected.add_edge(u, v, weight=weight)
+    return undirected
+
+# Louvain's repeated node moves take tens of seconds on graphs of tens of
+# thousands of nodes; above this size fast label propagation is used instead
+LOUVAIN_MAX_NODES = 5000
+
+def detect_communities(graph, seed=42):
+    """Communities of the graph, largest first
+
+    Louvain up to LOUVAIN_MAX_NODES nodes, fast label propagation above.
+    """
+    import networkx as nx
+    if graph.number_of_nodes() == 0:
+        return []
+    undirected = undirected_graph(graph)
+    if undirected.number_of_nodes() > LOUVAIN_MAX_NODES:
+        communities = nx.community.fast_label_propagation_communities(undirected, weight='weight', seed=seed)
+    else:
+        communities = nx.community.louvain_communities(undirected, seed=seed)
+    return sorted((set(c) for c in communities), key=len, reverse=True)
+
+def top_nodes(graph, max_nodes, by='degree'):
+    """Return the max_nodes highest-scoring nodes by degree or PageRank"""
+    import networkx as nx
+    if graph.number_of_nodes() <= max_nodes:
+        return list(graph.nodes)
+    if by == 'pagerank':
+        scores = nx.pagerank(graph, weight='weight')
+    else:
+        scores = dict(graph.degree(weight='weight'))
+    return sorted(scores, key=scores.get, reverse=True)[:max_nodes]
+
+def community_label(graph, members):
+    """Label a community after its best-connected member"""
+    hub = max(members, key=graph.degree)
+    return f"{graph.nodes[hub]['label']} (+{len(members) - 1})"
+
+def collapse_communities(graph, communities, expanded=(), max_nodes=DEFAULT_MAX_NODES):
+    """Replace each non-expanded community with a single super-node
+
+    Members of expanded communities stay individual nodes (top ones by degree
+    within the node budget); edges between groups are merged with summed
+    weights.
+    """
+    import networkx as nx
+    expanded = set(expanded)
+    budget = max(max_nodes - (len(communities) - len(expanded)), 1)
+    node_map = {}
+    reduced = nx.DiGraph()
+
+    for i, members in enumerate(communities):
+        if i in expanded:
+            continue
+        super_node = f"community:{i}"
+        reduced.add_node(
+            super_node,
+            label=community_label(graph, members),
+            title=f"Community {i} with {len(members)} nodes",
+            color=COMMUNITY_COLOR,
+            size=10 + min(len(members), 40),
+            community=i
+        )
+        for node in members:
+            node_map[node] = super_node
+
+    expanded_members = [n for i in sorted(expanded) if i < len(communities) for n in communities[i]]
+    for node in top_nodes(graph.subgraph(expanded_members), budget):
+        reduced.add_node(node, **graph.nodes[node])
+        node_map[node] = node
+
+    for u, v, data in graph.edges(data=True):
+        source, target = node_map.get(u), node_map.get(v)
+        if source is None or target is None or source == target:
+            continue
+        if reduced.has_edge(source, target):
+            merged = reduced.edges[source, target]
+            merged['weight'] += data['weight']
+            for rel_type, description in data['relationships'].items():
+                merged['relationships'].setdefault(rel_type, description)
+        else:
+            reduced.add_edge(source, target, weight=data['weight'], relationships=dict(data['relationships']))
+    return reduced
+
+def limit_edges(graph, max_edges):
+    """Keep the max_edges heaviest edges"""
+    import networkx as nx
+    if graph.number_of_edges() <= max_edges:
+        return graph
+    edges = sorted(graph.edges(data='weight'), key=lambda e: e[2], reverse=True)[:max_edges]
+    limited = nx.DiGraph()
+    limited.add_nodes_from(graph.nodes(data=True))
+    limited.add_edges_from((u, v, graph.edges[u, v]) for u, v, _ in edges)
+    return limited
+
+def reduce_graph(graph, mode='full', max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES,
+                 types=None, communities=None, expanded=()):
+    """Reduce a knowledge graph to a renderable level of detail
+
+    `types` filters by relationship type before reduction. In 'full' mode the
+    node budget still applies, falling back to the top nodes by degree.
+    """
+    if types:
+        graph = filter_relationships(graph, types)
+
+    if mode == 'communities':
+        if communities is None:
+            communities = detect_communities(graph)
+        reduced = collapse_communities(graph, communities, expanded, max_nodes)
+    else:
+        by = 'pagerank' if mode == 'pagerank' else 'degree'
+        reduced = graph.subgraph(top_nodes(graph, max_nodes, by))
+
+    return limit_edges(reduced, max_edges)
+
+def graph_hash(graph):
+    """Stable content hash of a graph's nodes and edges"""
+    digest = hashlib.sha256()
+    for node in sorted(graph.nodes):
+        digest.update(f"n:{node}\n".encode('utf-8'))
+    for u, v in sorted(graph.edges):
+        digest.update(f"e:{u}\t{v}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def compute_layout(graph, seed=LAYOUT_SEED):
+    """Compute deterministic node positions in pixel coordinates
+
+    Positions are scaled with the square root of the node count so larger
+    graphs get proportionally more room in the vis.js canvas.
+    """
+    import networkx as nx
+    if graph.number_of_nodes() == 0:
+        return {}
+    undirected = graph.to_undirected(as_view=True)
+    if graph.number_of_nodes() <= KAMADA_KAWAI_MAX_NODES:
+        positions = nx.kamada_kawai_layout(undirected)
+    else:
+        positions = nx.spring_layout(undirected, seed=seed, iterations=50)
+    scale = 100 * max(graph.number_of_nodes(), 4) ** 0.5
+    return {node: (float(x) * scale, float(y) * scale) for node, (x, y) in positions.items()}
+
+# Exact betweenness is O(V*E); once nodes * edges passes the work budget it
+# is estimated from a sample of source nodes sized so that sources * edges
+# stays within it (roughly a second of BFS)
+BETWEENNESS_WORK_BUDGET = 500000
+MIN_BETWEENNESS_SAMPLES = 10
+MAX_BETWEENNESS_SAMPLES = 200
+
+def _top_scores(graph, scores, top_k):
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{'node': graph.nodes[n]['label'], 'score': scores[n]} for n in ranked]
+
+def compute_analytics(graph, communities=None, top_k=20, seed=LAYOUT_SEED):
+    """Compute centrality, component and community statistics for a KB graph
+
+    Returns plain dicts/lists so the result can be cached and serialized.
+    """
+    import networkx as nx
+    undirected = undirected_graph(graph)
+    n_nodes = graph.number_of_nodes()
+    n_edges = undirected.number_of_edges()
+
+    components = sorted((len(c) for c in nx.connected_components(undirected)), reverse=True)
+    if communities is None:
+        communities = detect_communities(graph, seed=seed)
+
+    degree = dict(graph.degree())
+    pagerank = nx.pagerank(graph, weight='weight') if n_nodes else {}
+    samples = None
+    if n_nodes * n_edges > BETWEENNESS_WORK_BUDGET:
+        samples = BETWEENNESS_WORK_BUDGET // n_edges
+        samples = min(max(samples, MIN_BETWEENNESS_SAMPLES), MAX_BETWEENNESS_SAMPLES, n_nodes)
+    betweenness = nx.betweenness_centrality(undirected, k=samples, seed=seed) if n_nodes else {}
+
+    return {
+        'nodes': n_nodes,
+        'edges': graph.number_of_edges(),
+        'density': nx.density(graph) if n_nodes > 1 else 0.0,
+        'components': len(components),
+        'largest_component': components[0] if components else 0,
+        'component_sizes': components[:top_k],
+        'communities': len(communities),
+        'modularity': nx.community.modularity(undirected, communities) if communities else 0.0,
+        'community_sizes': [len(c) for c in communities[:top_k]],
+        'top_degree': _top_scores(graph, degree, top_k),
+        'top_pagerank': _top_scores(graph, pagerank, top_k),
+        'top_betweenness': _top_scores(graph, betweenness, top_k),
+        'betweenness_samples': samples
+    }
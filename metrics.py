@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import streamlit as st
+from settings import get_settings, on_reload
+
+# Latency buckets in seconds, from thumbnail fetches up to long transcriptions
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# The metrics file is rewritten at most this often (seconds) as spans finish
+EXPORT_INTERVAL = 1.0
+
+METRICS_HELP = {
+    'pipeline_stage_duration_seconds': ('histogram', "Time spent in each pipeline stage"),
+    'pipeline_stage_errors_total': ('counter', "Pipeline stage failures by error type"),
+    'pipeline_bytes_total': ('counter', "Bytes transferred by pipeline stage"),
+    'pipeline_audio_seconds_total': ('counter', "Seconds of audio processed"),
+    'pipeline_cache_requests_total': ('counter', "Cache lookups by cache and result")
+}
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class Metrics:
+    """Process-wide counters and latency histograms for the processing pipeline"""
+
+    def __init__(self, export_path=None):
+        self.export_path = export_path
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.last_export = 0.0
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter"""
+        key = (name, _labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record a value in a histogram"""
+        key = (name, _labels(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = {'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0, 'max': 0.0}
+                self.histograms[key] = histogram
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+            histogram['max'] = max(histogram['max'], value)
+
+    def error(self, stage, error_type):
+        """Count a failed stage"""
+        self.inc('pipeline_stage_errors_total', stage=stage, type=error_type)
+
+    def cache(self, cache, hit):
+        """Count a cache hit or miss"""
+        self.inc('pipeline_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+    @contextmanager
+    def span(self, stage):
+        """Time a pipeline stage, counting any exception raised inside it as an error"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(stage, type(e).__name__)
+            raise
+        finally:
+            self.observe('pipeline_stage_duration_seconds', time.perf_counter() - start, stage=stage)
+            self.export(force=False)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: dict(h, buckets=list(h['buckets'])) for key, h in self.histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in METRICS_HELP.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+            else:
+                for (metric, labels), histogram in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(DURATION_BUCKETS, histogram['buckets']):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, force=True):
+        """Write the metrics file, at most every EXPORT_INTERVAL seconds unless forced"""
+        if not self.export_path:
+            return
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_export < EXPORT_INTERVAL:
+                return
+            self.last_export = now
+        try:
+            if os.path.dirname(self.export_path):
+                os.makedirs(os.path.dirname(self.export_path), exist_ok=True)
+            tmp_path = f"{self.export_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(self.render())
+            os.replace(tmp_path, self.export_path)
+        except Exception:
+            pass
+
+    def stage_summary(self):
+        """Per-stage calls, errors and latency, slowest total first"""
+        with self.lock:
+            errors = {}
+            for (name, labels), value in self.counters.items():
+                if name == 'pipeline_stage_errors_total':
+                    stage = dict(labels)['stage']
+                    errors[stage] = errors.get(stage, 0) + value
+            rows = [{
+                'stage': dict(labels)['stage'],
+                'calls': h['count'],
+                'errors': errors.get(dict(labels)['stage'], 0),
+                'total_s': h['sum'],
+                'mean_s': h['sum'] / h['count'] if h['count'] else 0.0,
+                'max_s': h['max']
+            } for (name, labels), h in self.histograms.items() if name == 'pipeline_stage_duration_seconds']
+        total = sum(row['total_s'] for row in rows) or 1.0
+        for row in rows:
+            row['share'] = 100 * row['total_s'] / total
+        return sorted(rows, key=lambda row: row['total_s'], reverse=True)
+
+    def counter_values(self, name):
+        """(labels, value) pairs of one counter"""
+        with self.lock:
+            return [(dict(labels), value) for (metric, labels), value in self.counters.items() if metric == name]
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') not in ('', '/metrics'):
+            self.send_error(404)
+            return
+        body = get_metrics().render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port):
+    """Serve /metrics on a background thread"""
+    server = ThreadingHTTPServer(('0.0.0.0', int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+_lock = threading.Lock()
+_metrics = None
+_server_port = None
+
+def _configure(metrics):
+    """Point metrics at the configured export file and start the HTTP endpoint if its port is new"""
+    global _server_port
+    settings = get_settings()
+    metrics.export_path = settings['metrics_file']
+    port = settings['metrics_port']
+    if port and port != _server_port:
+        try:
+            start_metrics_server(port)
+            _server_port = port
+        except OSError:
+            # Another process already serves the port
+            pass
+
+def get_metrics():
+    """Process-wide metrics, starting the HTTP endpoint on first use if configured
+
+    Kept outside st.cache_resource because conversion prefetch threads record
+    metrics without a script run context.
+    """
+    global _metrics
+    if _metrics is None:
+        with _lock:
+            if _metrics is None:
+                metrics = Metrics()
+                _configure(metrics)
+                _metrics = metrics
+    return _metrics
+
+@on_reload
+def _reconfigure():
+    # Counters are kept; only where they are exported changes
+    with _lock:
+        if _metrics is not None:
+            _configure(_metrics)
+
+def metrics_sidebar():
+    """Sidebar dashboard of where pipeline time goes"""
+    metrics = get_metrics()
+    with st.sidebar.expander("Pipeline Metrics"):
+        rows = metrics.stage_summary()
+        if not rows:
+            st.write("No pipeline activity yet")
+            return
+        st.dataframe(
+            rows,
+            column_config={
+                "stage": "Stage",
+                "calls": "Calls",
+                "errors": "Errors",
+                "total_s": st.column_config.NumberColumn("Total (s)", format="%.1f"),
+                "mean_s": st.column_config.NumberColumn("Mean (s)", format="%.2f"),
+                "max_s": st.column_config.NumberColumn("Max (s)", format="%.2f"),
+                "share": st.column_config.ProgressColumn("Share", format="%.0f%%", min_value=0, max_value=100)
+            },
+            hide_index=True
+        )
+        for labels, value in sorted(metrics.counter_values('pipeline_bytes_total'), key=lambda c: c[0]['stage']):
+            st.write(f"{labels['stage'].capitalize()} bytes: {value / 1e6:.1f} MB")
+        audio = sum(value for _, value in metrics.counter_values('pipeline_audio_seconds_total'))
+        if audio:
+            st.write(f"Audio processed: {audio / 60:.1f} min")
+        caches = {}
+        for labels, value in metrics.counter_values('pipeline_cache_requests_total'):
+            caches.setdefault(labels['cache'], {})[labels['result']] = value
+        for cache, results in sorted(caches.items()):
+            hits, misses = results.get('hit', 0), results.get('miss', 0)
+            st.write(f"{cache.replace('_', ' ').capitalize()} cache: {hits}/{hits + misses} hits")
+        metrics.export()
@@ -1,22 +1,19 @@
 import streamlit as st
-import requests
-import json
-from PIL import Image
-from io import BytesIO
-from dotenv import load_dotenv
-import os
+import uuid
+from settings import get_settings, get_http_session
+from conversion import POLL_INTERVAL, get_conversion_prefetcher
+from metrics import get_metrics, metrics_sidebar
+from profiling import run_page
+from session_store import get_state, put_state
+from scheduling import annotate_result, conversion_attempts, estimate_basket, format_duration
+
+SIDEBAR_VIDEOS = 20
 
 def get_api_config():
     """Get API configuration with detailed error checking"""
-    load_dotenv()  # Load environment variables as fallback
-    
-    # Try to get API keys from Streamlit secrets first, then fall back to env vars
-    try:
-        api_key = st.secrets.api_credentials.rapidapi_key
-        api_host = st.secrets.api_credentials.yt_rapidapi_host
-    except:
-        api_key = os.getenv('RAPIDAPI_KEY')
-        api_host = os.getenv('YT_RAPIDAPI_HOST')
+    settings = get_settings()
+    api_key = settings['rapidapi_key']
+    api_host = settings['yt_rapidapi_host']
     
     if not api_key or not api_host:
         st.error("API configuration error. Please check your credentials.")
@@ -28,7 +25,7 @@ def get_api_config():
     }
 
 def search_youtube(query, country_code="US", language="en"):
-    url = "https://yt-api.p.rapidapi.com/search"
+    url = f"{get_settings()['yt_api_base_url']}/search"
     
     querystring = {
         "query": query,
@@ -46,15 +43,21 @@ def search_youtube(query, country_code="US", language="en"):
         "x-rapidapi-host": api_config['host']
     }
     
+    metrics = get_metrics()
     try:
         with st.spinner('Searching...'):
-            response = requests.get(url, headers=headers, params=querystring)
+            with metrics.span('search'):
+                response = get_http_session().get(url, headers=headers, params=querystring)
             
             if response.status_code != 200:
+                metrics.error('search', f"http_{response.status_code}")
                 st.error("Failed to fetch search results")
                 return None
                 
-            return response.json()
+            results = response.json()
+            for item in results.get('data', []):
+                annotate_result(item)
+            return results
             
     except Exception as e:
         st.error("Error occurred while searching")
@@ -86,17 +89,37 @@ def main():
         st.session_state.last_country = "US"
     if 'last_language' not in st.session_state:
         st.session_state.last_language = "en"
+    if 'prefetch_owner' not in st.session_state:
+        st.session_state.prefetch_owner = uuid.uuid4().hex
+    
+    prefetcher = get_conversion_prefetcher()
+    prefetch_labels = {'converting': " (converting...)", 'ready': " (ready)"}
     
     # Show selected videos count and list in sidebar
     st.sidebar.write(f"Selected Videos: {len(st.session_state.selected_videos)}")
     if st.session_state.selected_videos:
         st.sidebar.write("Selected:")
-        for video in st.session_state.selected_videos:
-            st.sidebar.write(f"- {video['title'][:50]}...")
+        # Playlists and channels can fill the basket with hundreds of videos
+        for video in st.session_state.selected_videos[:SIDEBAR_VIDEOS]:
+            status = prefetcher.status(video['video_id']) if 'video_id' in video else None
+            st.sidebar.write(f"- {video['title'][:50]}...{prefetch_labels.get(status, '')}")
+        hidden = len(st.session_state.selected_videos) - SIDEBAR_VIDEOS
+        if hidden > 0:
+            st.sidebar.write(f"...and {hidden} more")
+    
+    if st.session_state.selected_videos:
+        estimate = estimate_basket(st.session_state.selected_videos)
+        st.sidebar.caption(
+            f"About {estimate['audio_minutes']:.0f} min of audio, ${estimate['cost']:.2f} Groq cost, "
+            f"{format_duration(estimate['wall_seconds'])} to process"
+            + (f" ({estimate['unknown']} of unknown length)" if estimate['unknown'] else "")
+        )
     
     if st.sidebar.button("Process Selected Videos"):
         st.switch_page("pages/2_YouTube_Downloader.py")
     
+    metrics_sidebar()
+    
     # Search inputs
     col1, col2, col3 = st.columns(3)
     
@@ -114,25 +137,32 @@ def main():
         )
     
     def handle_selection(video_data):
+        owner = st.session_state.prefetch_owner
         if video_data['url'] in [v['url'] for v in st.session_state.selected_videos]:
             st.session_state.selected_videos = [
                 v for v in st.session_state.selected_videos 
                 if v['url'] != video_data['url']
             ]
+            prefetcher.cancel(video_data['video_id'], owner)
         else:
             st.session_state.selected_videos.append(video_data)
+            # Start converting right away so the download link is likely
+            # ready by the time the videos are processed
+            attempts = conversion_attempts(video_data['duration_seconds'], POLL_INTERVAL)
+            if not prefetcher.prefetch(video_data['video_id'], owner, attempts):
+                st.toast("Conversion will start when the videos are processed")
     
     # Search button or results already exist
-    if st.button("Search") or st.session_state.search_results:
+    if st.button("Search") or st.session_state.search_results is not None:
         if query and (query != st.session_state.last_query or 
                      country != st.session_state.last_country or 
                      language != st.session_state.last_language):
-            st.session_state.search_results = search_youtube(query, country, language)
+            put_state('search_results', search_youtube(query, country, language))
             st.session_state.last_query = query
             st.session_state.last_country = country
             st.session_state.last_language = language
         
-        results = st.session_state.search_results
+        results = get_state('search_results')
         if results and "data" in results:
             st.success(f"Found {len(results['data'])} results")
             
@@ -146,9 +176,10 @@ def main():
                         if "thumbnail" in item:
                             thumbnail_url = item["thumbnail"][0]["url"]
                             try:
-                                response = requests.get(thumbnail_url)
-                                img = Image.open(BytesIO(response.content))
-                                st.image(img, width=160)
+                                with get_metrics().span('thumbnail'):
+                                    response = get_http_session().get(thumbnail_url)
+                                get_metrics().inc('pipeline_bytes_total', len(response.content), stage='thumbnail')
+                                st.image(response.content, width=160)
                             except:
                                 st.write("Thumbnail not available")
                     
@@ -157,7 +188,8 @@ def main():
                         video_url = f"https://youtube.com/watch?v={item['videoId']}"
                         st.markdown(f"### [{item['title']}]({video_url})")
                         st.write(f"Channel: {item.get('channelTitle', 'N/A')}")
-                        st.write(f"Views: {item.get('viewCount', 'N/A')}")
+                        views = item.get('view_count')
+                        st.write(f"Views: {views:,}" if views is not None else "Views: N/A")
                         st.write(f"Duration: {item.get('lengthText', 'N/A')}")
                         if "description" in item:
                             st.write(f"Description: {item['description'][:200]}...")
@@ -166,7 +198,10 @@ def main():
                     with col3:
                         video_data = {
                             'url': video_url,
-                            'title': item['title']
+                            'title': item['title'],
+                            'video_id': item['videoId'],
+                            'duration_seconds': item.get('duration_seconds'),
+                            'view_count': item.get('view_count')
                         }
                         is_selected = video_url in [v['url'] for v in st.session_state.selected_videos]
                         button_label = 'Deselect' if is_selected else 'Select for Transcription'
@@ -182,4 +217,4 @@ def main():
         st.warning("Please enter a search query")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    run_page("YouTube Search", main) 
\ No newline at end of file
@@ -1,23 +1,42 @@
 # Copy all code from youtube_downloader.py
 import streamlit as st
-import re
 import requests
-import time
 import os
+import shutil
 import subprocess
-from groq import Groq
-from dotenv import load_dotenv
+import tempfile
 import json
+from transcript_dedup import get_transcript_index, find_near_duplicates
+from audio_fingerprint import SAMPLE_RATE, get_fingerprint_index, decode_pcm, fingerprint_samples
+from audio_cache import get_audio_cache
+from kb_loader import KnowledgeBaseFormatError, parse_knowledge_base
+from graph_store import get_graph_store
+from search_index import get_search_index
+from conversion import POLL_INTERVAL, get_conversion_prefetcher, poll_conversion
+from metrics import get_metrics, metrics_sidebar
+from profiling import run_page
+from session_store import get_state, pop_state, put_state
+from single_flight import get_video_jobs
+from ingestion import MAX_VIDEOS_PER_SOURCE, add_to_basket, expand_urls, extract_video_id, parse_youtube_url
+from scheduling import (
+    GROQ_PRICE_PER_HOUR, SCHEDULES, TRANSCRIPTION_MODEL, conversion_attempts, estimate_basket, format_duration,
+    schedule, transcription_timeout
+)
+from transcode import DEFAULT_PRESET, TRANSCODE_PRESETS, ffmpeg_command, profile_key, transcode
+from settings import get_settings, get_http_session, get_groq_client, get_kb_client
 
 class YouTubeDownloader:
     def __init__(self):
-        load_dotenv()
         self.transcripts = []
         self.status_placeholder = None
-        self.kb_api_endpoint = "http://37.27.34.28/v1/workflows/run"
+        self.job_key = None
+        self.kb_api_endpoint = get_settings()['kb_api_endpoint']
 
     def update_status(self, message, is_error=False):
         """Update status message in the UI"""
+        if self.job_key:
+            # Sessions waiting on this job show the same progress
+            get_video_jobs().report(self.job_key, message)
         if is_error:
             self.status_placeholder.error(message)
         else:
@@ -25,62 +44,32 @@ class YouTubeDownloader:
 
     def extract_video_id(self, url):
         """Extract YouTube video ID from URL"""
-        patterns = [
-            r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-            r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+        return extract_video_id(url)
 
-    def check_conversion_status(self, video_id):
+    def check_conversion_status(self, video_id, max_attempts=None):
         """Check conversion status from API"""
-        try:
-            # Try to get API keys from Streamlit secrets first
-            headers = {
-                'x-rapidapi-key': st.secrets.api_credentials.rapidapi_key,
-                'x-rapidapi-host': st.secrets.api_credentials.rapidapi_host
-            }
-        except:
-            # Fall back to environment variables
-            headers = {
-                'x-rapidapi-key': os.getenv('RAPIDAPI_KEY'),
-                'x-rapidapi-host': os.getenv('RAPIDAPI_HOST')
-            }
+        # Conversions started speculatively on the search page are usually done by now
+        link = get_conversion_prefetcher().link(video_id)
+        get_metrics().cache('conversion_prefetch', bool(link))
+        if link:
+            self.update_status("Using download link prepared in the background")
+            return link
         
         self.update_status("Starting video conversion...")
-        attempts = 0
-        max_attempts = 15  # Reduced from 30 to 15 attempts
         
-        while attempts < max_attempts:
-            try:
-                response = requests.get(
-                    f"https://youtube-mp36.p.rapidapi.com/dl?id={video_id}",
-                    headers=headers
-                )
-                data = response.json()
-                
-                # Check for different status responses
-                if data.get('status') == 'ok':
-                    self.update_status("Video conversion completed successfully!")
-                    return data.get('link')
-                elif data.get('status') == 'processing':
-                    self.update_status(f"Video is being converted... (Attempt {attempts + 1}/{max_attempts})")
-                elif data.get('status') == 'fail':
-                    self.update_status(f"Conversion failed: {data.get('msg', 'Unknown error')}", is_error=True)
-                    return None
-                
-                time.sleep(4)  # Increased delay between attempts to 4 seconds
-                attempts += 1
-                
-            except Exception as e:
-                self.update_status(f"Conversion error: {str(e)}", is_error=True)
-                return None
+        def on_progress(attempt, max_attempts):
+            self.update_status(f"Video is being converted... (Attempt {attempt}/{max_attempts})")
         
-        self.update_status("Conversion timed out - video might be too long or unavailable", is_error=True)
+        result = poll_conversion(video_id, on_progress=on_progress, max_attempts=max_attempts)
+        if result['status'] == 'ok':
+            self.update_status("Video conversion completed successfully!")
+            return result['link']
+        elif result['status'] == 'fail':
+            self.update_status(f"Conversion failed: {result['message']}", is_error=True)
+        elif result['status'] == 'error':
+            self.update_status(f"Conversion error: {result['message']}", is_error=True)
+        else:
+            self.update_status("Conversion timed out - video might be too long or unavailable", is_error=True)
         return None
 
     def check_ffmpeg(self):
@@ -101,18 +90,74 @@ class YouTubeDownloader:
             """, is_error=True)
             return False
 
-    def download_and_process_file(self, url):
+    def process_video(self, video_id, title=None, model=TRANSCRIPTION_MODEL, duration=None, preset=DEFAULT_PRESET):
+        """Convert, download and transcribe a video, sharing the work with other sessions
+
+        A session asking for a video that another session is already processing
+        with the same model and transcode preset waits for that job and gets its
+        transcript. Timeouts scale with the video's duration in seconds when it
+        is known.
+        """
+        key = (video_id, model, profile_key(preset))
+        led = []
+
+        def run():
+            led.append(True)
+            self.job_key = key
+            try:
+                # Retries and other models reuse the transcoded file from an earlier run
+                cached_path = self.cached_audio(video_id, preset)
+                if cached_path:
+                    self.update_status("Using cached audio, skipping conversion and download")
+                    return self.transcribe_audio(cached_path, video_id, title, model, duration)
+                download_link = self.check_conversion_status(video_id, conversion_attempts(duration, POLL_INTERVAL))
+                if not download_link:
+                    return None
+                return self.download_and_process_file(download_link, video_id, title, model, duration, preset)
+            finally:
+                self.job_key = None
+
+        def on_wait(status, waiters):
+            self.update_status(f"Another session is already processing this video: {status or 'starting...'}")
+
+        transcript = get_video_jobs().run(key, run, on_wait)
+        # A hit means this session attached to another session's job
+        get_metrics().cache('video_job', not led)
+        if transcript and not led:
+            self.update_status("Transcription completed by another session")
+        return transcript
+
+    def cached_audio(self, video_id, preset=DEFAULT_PRESET):
+        """Path of this video's cached transcoded audio, or None"""
+        try:
+            path = get_audio_cache().get(video_id, profile_key(preset))
+        except Exception as e:
+            self.update_status(f"Audio cache unavailable: {str(e)}")
+            return None
+        get_metrics().cache('audio', bool(path))
+        return path
+
+    def download_and_process_file(
+        self, url, video_id=None, title=None, model=TRANSCRIPTION_MODEL, duration=None, preset=DEFAULT_PRESET
+    ):
         """Download MP3 and process it"""
+        work_dir = None
         try:
             # Check FFmpeg first
             if not self.check_ffmpeg():
                 return None
 
+            metrics = get_metrics()
+            
             # Download the MP3 file
             self.update_status("Downloading MP3 file...")
-            response = requests.get(url)
-            mp3_path = "audio_file.mp3"
-            ogg_path = "audio.ogg"
+            with metrics.span('download'):
+                response = get_http_session().get(url)
+            metrics.inc('pipeline_bytes_total', len(response.content), stage='download')
+            # Each call gets its own scratch directory so concurrent jobs never share files
+            work_dir = tempfile.mkdtemp(prefix="yt-audio-")
+            mp3_path = os.path.join(work_dir, "audio_file.mp3")
+            ogg_path = os.path.join(work_dir, "audio.ogg")
             
             with open(mp3_path, "wb") as f:
                 f.write(response.content)
@@ -120,20 +165,8 @@ class YouTubeDownloader:
             # Convert to OGG
             self.update_status("Converting audio format...")
             try:
-                # Add full path for ffmpeg in Streamlit Cloud
-                ffmpeg_cmd = 'ffmpeg'
-                if os.path.exists('/usr/bin/ffmpeg'):
-                    ffmpeg_cmd = '/usr/bin/ffmpeg'
-                elif os.path.exists('/usr/local/bin/ffmpeg'):
-                    ffmpeg_cmd = '/usr/local/bin/ffmpeg'
-                
-                subprocess.run([
-                    ffmpeg_cmd, '-i', mp3_path,
-                    '-vn', '-map_metadata', '-1',
-                    '-ac', '1', '-c:a', 'libopus',
-                    '-b:a', '12k', '-application', 'voip',
-                    ogg_path
-                ], check=True, capture_output=True)
+                with metrics.span('transcode'):
+                    transcode(mp3_path, ogg_path, preset)
             except subprocess.CalledProcessError as e:
                 self.update_status(f"FFmpeg conversion error: {e.stderr.decode()}", is_error=True)
                 return None
@@ -141,29 +174,75 @@ class YouTubeDownloader:
                 self.update_status(f"FFmpeg error: {str(e)}", is_error=True)
                 return None
             
+            # Keep the transcoded file so retries and other models skip conversion and download
+            if video_id:
+                try:
+                    ogg_path = get_audio_cache().put(video_id, profile_key(preset), ogg_path)
+                except Exception as e:
+                    self.update_status(f"Could not cache audio: {str(e)}")
+            
+            return self.transcribe_audio(ogg_path, video_id, title, model, duration)
+                
+        except Exception as e:
+            self.update_status(f"Processing error: {str(e)}", is_error=True)
+            return None
+        finally:
+            # Clean up
+            if work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def transcribe_audio(self, ogg_path, video_id=None, title=None, model=TRANSCRIPTION_MODEL, duration=None):
+        """Transcribe a transcoded file, reusing the transcript of matching audio when possible"""
+        metrics = get_metrics()
+        try:
+            # Reuse an existing transcript if the same audio was already
+            # transcribed, possibly under a different video ID. Stored
+            # transcripts come from the default model, so other models
+            # always transcribe.
+            fingerprint = None
+            audio_seconds = None
+            if model == TRANSCRIPTION_MODEL:
+                try:
+                    self.update_status("Fingerprinting audio...")
+                    with metrics.span('fingerprint'):
+                        samples = decode_pcm(ogg_path, ffmpeg_command())
+                        audio_seconds = len(samples) / SAMPLE_RATE
+                        fingerprint = fingerprint_samples(samples)
+                        match = get_fingerprint_index().find_match(fingerprint)
+                    metrics.inc('pipeline_audio_seconds_total', audio_seconds, stage='fingerprint')
+                    metrics.cache('fingerprint', bool(match))
+                    if match:
+                        self.update_status(
+                            f"Audio matches video {match['video_id']} ({match['score']:.0%} aligned), reusing its transcript"
+                        )
+                        self.index_transcript(video_id, title, match['transcript'])
+                        return match['transcript']
+                except Exception as e:
+                    self.update_status(f"Audio fingerprinting skipped: {str(e)}")
+            
             # Transcribe using Groq
             self.update_status("Initializing transcription service...")
-            try:
-                client = Groq(
-                    api_key=st.secrets.api_credentials.groq_api_key
-                )
-            except:
-                client = Groq(
-                    api_key=os.getenv('GROQ_API_KEY')
-                )
+            client = get_groq_client()
             
             self.update_status("Starting transcription...")
-            with open(ogg_path, "rb") as file:
+            with open(ogg_path, "rb") as file, metrics.span('transcription'):
                 transcription = client.audio.transcriptions.create(
                     file=(ogg_path, file.read()),
-                    model="whisper-large-v3-turbo",
+                    model=model,
                     response_format="verbose_json",
+                    timeout=transcription_timeout(duration),
                 )
+            audio_seconds = getattr(transcription, 'duration', None) or audio_seconds
+            if audio_seconds:
+                metrics.inc('pipeline_audio_seconds_total', audio_seconds, stage='transcription')
             
-            # Clean up
-            self.update_status("Cleaning up temporary files...")
-            os.remove(mp3_path)
-            os.remove(ogg_path)
+            self.index_transcript(video_id, title, transcription.text, getattr(transcription, 'segments', None))
+            
+            if fingerprint is not None and video_id:
+                try:
+                    get_fingerprint_index().add(video_id, fingerprint, transcription.text)
+                except Exception as e:
+                    self.update_status(f"Could not store audio fingerprint: {str(e)}")
             
             self.update_status("Transcription completed successfully!")
             return transcription.text
@@ -172,7 +251,16 @@ class YouTubeDownloader:
             self.update_status(f"Processing error: {str(e)}", is_error=True)
             return None
 
-    def generate_knowledge_base(self, keyword, language_code, combined_transcription):
+    def index_transcript(self, video_id, title, text, segments=None):
+        """Add a transcript to the full-text search index"""
+        if not video_id:
+            return
+        try:
+            get_search_index().add_transcript(video_id, title, text, segments)
+        except Exception as e:
+            self.update_status(f"Could not index transcript: {str(e)}")
+
+    def generate_knowledge_base(self, keyword, language_code, combined_transcription, video_urls=()):
         """Generate knowledge base from transcriptions"""
         self.update_status("Initializing knowledge base generation...")
         
@@ -193,10 +281,7 @@ class YouTubeDownloader:
         
         try:
             # Get API key from secrets or environment variables
-            try:
-                api_key = st.secrets.api_credentials.knowledge_base_api_key
-            except:
-                api_key = os.getenv('KNOWLEDGE_BASE_API_KEY')
+            api_key = get_settings()['knowledge_base_api_key']
             
             if not api_key:
                 self.update_status("API key not found", is_error=True)
@@ -204,10 +289,8 @@ class YouTubeDownloader:
                 
             self.update_status(f"Using API key: {api_key[:8]}...")
             
-            headers = {
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            }
+            client = get_kb_client()
+            headers = client.headers
             
             # Match exactly the test file payload structure
             payload = {
@@ -248,12 +331,15 @@ class YouTubeDownloader:
             with st.spinner('Generating knowledge base... This might take a while.'):
                 try:
                     self.update_status("Making API request...")
-                    response = requests.post(
-                        self.kb_api_endpoint,
-                        headers=headers,
-                        json=payload,
-                        timeout=300
-                    )
+                    with get_metrics().span('knowledge_base'):
+                        response = client.post(
+                            self.kb_api_endpoint,
+                            json=payload,
+                            timeout=300
+                        )
+                    get_metrics().inc('pipeline_bytes_total', len(response.content), stage='knowledge_base')
+                    if response.status_code != 200:
+                        get_metrics().error('knowledge_base', f"http_{response.status_code}")
                     
                     self.update_status(f"Response status code: {response.status_code}")
                     self.update_status(f"Response headers: {dict(response.headers)}")
@@ -271,7 +357,19 @@ class YouTubeDownloader:
                         # Check if response contains expected data structure
                         if isinstance(result, (list, dict)):
                             self.update_status("Knowledge base generated successfully!")
-                            st.session_state['knowledge_base'] = result
+                            # Keep the validated, compact form for the Knowledge Base Viewer
+                            try:
+                                kb, report = parse_knowledge_base(result)
+                                put_state('knowledge_base', kb)
+                                if report['invalid']:
+                                    self.update_status(f"Skipped {report['invalid']} invalid knowledge base records")
+                                # Accumulate every run in the persistent graph store
+                                get_graph_store().upsert(kb, keyword, language_code, video_urls)
+                                get_search_index().add_relationships(kb, keyword)
+                            except KnowledgeBaseFormatError as e:
+                                self.update_status(f"Knowledge base cannot be shown in the viewer: {str(e)}", is_error=True)
+                            except Exception as e:
+                                self.update_status(f"Could not save knowledge base to the graph store or search index: {str(e)}", is_error=True)
                             return result
                         else:
                             self.update_status(f"Unexpected response format: {type(result)}", is_error=True)
@@ -318,6 +416,8 @@ def main():
     # Create a placeholder for status messages
     downloader.status_placeholder = st.empty()
     
+    metrics_sidebar()
+    
     # Get selected videos from session state
     selected_videos = st.session_state.get('selected_videos', [])
     
@@ -327,10 +427,20 @@ def main():
     
     if not selected_videos:
         # Show manual URL input if no videos were selected
-        url = st.text_input("Enter YouTube URL:")
+        text = st.text_area("Enter YouTube URLs (videos, playlists or channels, one per line):")
+        urls = [line.strip() for line in text.splitlines() if line.strip()]
         title = "Manual Entry"
-        if url:
-            selected_videos = [{'url': url, 'title': title}]
+        add_clicked = False
+        targets = [parse_youtube_url(url) for url in urls]
+        if urls and all(target is None or target[0] == 'video' for target in targets):
+            selected_videos = [{'url': url, 'title': title} for url in urls]
+        elif urls:
+            # Playlists and channels are expanded into the basket in one go
+            # instead of being listed for selection one video at a time
+            limit = st.number_input(
+                "Videos per playlist or channel", min_value=1, max_value=1000, value=MAX_VIDEOS_PER_SOURCE
+            )
+            add_clicked = st.button("Add to Basket")
             
         # If manual entry, also ask for keyword and language
         keyword = st.text_input("Enter keyword for knowledge base:", value=keyword)
@@ -339,9 +449,71 @@ def main():
             ["en", "pl", "de", "fr", "es", "it", "ja", "ko", "ru"],
             index=["en", "pl", "de", "fr", "es", "it", "ja", "ko", "ru"].index(language_code)
         )
+        
+        if add_clicked:
+            with st.spinner("Fetching playlist and channel videos..."):
+                videos, errors = expand_urls(urls, limit)
+            for url, message in errors:
+                st.error(f"Could not add {url}: {message}")
+            added = add_to_basket(st.session_state.setdefault('selected_videos', []), videos)
+            if added:
+                # The keyword and language inputs are not shown once the basket has videos
+                st.session_state.last_query = keyword
+                st.session_state.last_language = language_code
+                st.session_state.ingest_message = f"Added {added} videos to the basket"
+                st.rerun()
+            st.warning("No new videos found")
     else:
+        if 'ingest_message' in st.session_state:
+            st.success(st.session_state.pop('ingest_message'))
         st.write(f"Processing {len(selected_videos)} selected videos")
     
+    model = TRANSCRIPTION_MODEL
+    preset = DEFAULT_PRESET
+    if selected_videos:
+        # Changing the model re-transcribes the basket from cached audio
+        models = list(GROQ_PRICE_PER_HOUR)
+        col1, col2 = st.columns(2)
+        with col1:
+            model = st.selectbox("Transcription model", models, index=models.index(TRANSCRIPTION_MODEL))
+        with col2:
+            preset = st.selectbox(
+                "Audio preset", list(TRANSCODE_PRESETS),
+                index=list(TRANSCODE_PRESETS).index(DEFAULT_PRESET),
+                format_func=lambda name: TRANSCODE_PRESETS[name]['label']
+            )
+        estimate = estimate_basket(selected_videos, model)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Videos", estimate['videos'])
+        col2.metric("Audio", f"{estimate['audio_minutes']:.0f} min")
+        col3.metric("Groq cost", f"${estimate['cost']:.2f}")
+        col4.metric("Estimated time", format_duration(estimate['wall_seconds']))
+        if estimate['unknown']:
+            st.caption(f"{estimate['unknown']} video(s) of unknown length are not included in the audio and cost totals")
+        try:
+            cache = get_audio_cache().stats()
+            st.caption(
+                f"Audio cache: {cache['files']} files, "
+                f"{cache['bytes'] / 1e6:.0f} of {cache['quota_bytes'] / 1e6:.0f} MB"
+            )
+        except Exception:
+            pass
+        
+        # Long videos go last by default so they cannot hold up the rest of the basket
+        col1, col2 = st.columns(2)
+        with col1:
+            order = st.selectbox("Processing order", list(SCHEDULES), index=1, format_func=SCHEDULES.get)
+        deadline = None
+        if order == 'deadline':
+            with col2:
+                deadline = 60 * st.number_input("Deadline (minutes)", min_value=1, value=30)
+        selected_videos, deferred = schedule(selected_videos, order, deadline)
+        if deferred:
+            st.warning(
+                f"{len(deferred)} video(s) are not expected to finish within the deadline and were skipped: "
+                + ", ".join(v['title'] for v in deferred)
+            )
+    
     # Process all videos
     all_transcripts = []
     
@@ -357,25 +529,18 @@ def main():
             downloader.update_status(f"Invalid YouTube URL: {url}", is_error=True)
             continue
         
-        # Get download link
+        # Convert, download and transcribe, or wait for another session doing the same
         progress_bar.progress(30)
-        download_link = downloader.check_conversion_status(video_id)
+        transcript = downloader.process_video(video_id, video['title'], model, video.get('duration_seconds'), preset)
         
-        if download_link:
-            # Process the file and get transcript
-            progress_bar.progress(60)
-            transcript = downloader.download_and_process_file(download_link)
-            
-            if transcript:
-                progress_bar.progress(100)
-                all_transcripts.append({
-                    'title': video['title'],
-                    'url': url,
-                    'transcript': transcript
-                })
-                st.success(f"Successfully processed: {video['title']}")
-            else:
-                progress_bar.progress(0)
+        if transcript:
+            progress_bar.progress(100)
+            all_transcripts.append({
+                'title': video['title'],
+                'url': url,
+                'transcript': transcript
+            })
+            st.success(f"Successfully processed: {video['title']}")
         else:
             progress_bar.progress(0)
     
@@ -383,8 +548,28 @@ def main():
     if all_transcripts:
         st.success("All transcriptions complete!")
         
+        # Flag re-uploads, clips and compilations before they reach the knowledge base
+        duplicates = find_near_duplicates(get_transcript_index(), all_transcripts)
+        if duplicates:
+            st.subheader("Near-duplicate Videos:")
+            for dup in duplicates:
+                source = "" if dup['in_batch'] else " from a previous run"
+                st.write(f"- {dup['title']} is {dup['similarity']:.0%} similar to {dup['duplicate_of_title']}{source}")
+            titles = {t['url']: t['title'] for t in all_transcripts}
+            # Only duplicates of another video in this batch are dropped by default;
+            # a match from a previous run is not in this knowledge base
+            dropped_urls = st.multiselect(
+                "Drop before generating the knowledge base:",
+                options=[dup['url'] for dup in duplicates],
+                default=[dup['url'] for dup in duplicates if dup['in_batch']],
+                format_func=lambda u: titles.get(u, u)
+            )
+            all_transcripts = [t for t in all_transcripts if t['url'] not in dropped_urls]
+        
         # Store combined transcripts in session state if not already there
-        if 'combined_transcription' not in st.session_state:
+        kept_urls = [t['url'] for t in all_transcripts]
+        if ('combined_transcription' not in st.session_state or
+                st.session_state.get('combined_transcription_urls') != kept_urls):
             combined_text = ""
             for t in all_transcripts:
                 combined_text += f"\n\n{'='*50}\n"
@@ -392,16 +577,18 @@ def main():
                 combined_text += f"URL: {t['url']}\n"
                 combined_text += f"{'='*50}\n\n"
                 combined_text += t['transcript']
-            st.session_state.combined_transcription = combined_text
+            put_state('combined_transcription', combined_text)
+            st.session_state.combined_transcription_urls = kept_urls
         
         # Display combined transcript
         st.subheader("Combined Transcript:")
-        st.text_area("", st.session_state.combined_transcription, height=300)
+        combined_transcription = get_state('combined_transcription', "")
+        st.text_area("", combined_transcription, height=300)
         
         # Download button for combined transcript
         st.download_button(
             label="Download Combined Transcript",
-            data=st.session_state.combined_transcription,
+            data=combined_transcription,
             file_name="combined_transcripts.txt",
             mime="text/plain"
         )
@@ -420,7 +607,8 @@ def main():
                 result = downloader.generate_knowledge_base(
                     keyword=keyword,
                     language_code=language_code,
-                    combined_transcription=st.session_state.combined_transcription
+                    combined_transcription=combined_transcription,
+                    video_urls=st.session_state.combined_transcription_urls
                 )
                 
                 if result is not None:  # Changed from if result:
@@ -436,9 +624,9 @@ def main():
         if 'selected_videos' in st.session_state:
             if st.button("Clear Selected Videos"):
                 st.session_state.selected_videos = []
-                if 'combined_transcription' in st.session_state:
-                    del st.session_state.combined_transcription
+                pop_state('combined_transcription')
+                st.session_state.pop('combined_transcription_urls', None)
                 st.rerun()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    run_page("YouTube Downloader", main) 
\ No newline at end of file
@@ -1,11 +1,15 @@
 import streamlit as st
-import json
-import pandas as pd
-import networkx as nx
-import matplotlib.pyplot as plt
-from pyvis.network import Network
-import tempfile
 import os
+from kb_loader import KnowledgeBaseFormatError, load_knowledge_base
+from kb_export import EXPORT_FORMATS, cached_export_path, export_knowledge_base, read_export
+from graph_store import get_graph_store
+from knowledge_graph import (
+    DEFAULT_MAX_NODES, DEFAULT_MAX_EDGES, REDUCTION_MODES, build_graph, community_label,
+    compute_analytics, compute_layout, detect_communities, filter_relationships, graph_hash, reduce_graph,
+    relationship_types
+)
+from profiling import run_page
+from session_store import get_state, put_state
 
 def check_auth():
     """Check if user is authenticated"""
@@ -16,50 +20,236 @@ def check_auth():
         st.error("Please log in first")
         st.stop()
 
-def visualize_knowledge_graph(relationships):
-    """Create an interactive network graph"""
-    net = Network(height="750px", width="100%", bgcolor="#ffffff", font_color="black")
+@st.cache_resource(max_entries=4)
+def load_graph(kb_hash, _kb):
+    """Build the full knowledge graph once per KB"""
+    return build_graph(_kb.relationships)
+
+@st.cache_resource(max_entries=8)
+def load_communities(kb_hash, _kb, types=()):
+    """Detect communities once per KB and relationship-type filter"""
+    graph = load_graph(kb_hash, _kb)
+    if types:
+        graph = filter_relationships(graph, types)
+    return detect_communities(graph)
+
+@st.cache_data(max_entries=16, show_spinner="Computing graph layout...")
+def load_layout(graph_key, _graph):
+    """Compute node positions once per distinct (reduced) graph"""
+    return compute_layout(_graph)
+
+@st.cache_data(max_entries=8, show_spinner="Rendering knowledge graph...")
+def visualize_knowledge_graph(kb_hash, _kb, height="750px", mode='full',
+                              max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES,
+                              types=(), expanded=()):
+    """Create an interactive network graph
+
+    The rendered HTML is memoized by the KB hash and render options, so tab
+    switches and download clicks reuse it instead of rebuilding the network.
+    """
+    graph = load_graph(kb_hash, _kb)
+    communities = load_communities(kb_hash, _kb, types) if mode == 'communities' else None
+    graph = reduce_graph(
+        graph, mode=mode, max_nodes=max_nodes, max_edges=max_edges,
+        types=types, communities=communities, expanded=expanded
+    )
+    
+    positions = load_layout(graph_hash(graph), graph)
+    
+    from pyvis.network import Network
+    net = Network(height=height, width="100%", bgcolor="#ffffff", font_color="black")
+    # Positions are precomputed server-side, so the browser only has to draw
+    net.toggle_physics(False)
     
     # Add nodes and edges
-    for rel in relationships:
-        entity = rel['entity']
-        attribute = rel['attribute']
-        relationship = rel['relationship']
-        
-        # Add nodes
-        net.add_node(entity, label=entity, title=entity, color="#00ff1e")
-        net.add_node(attribute, label=attribute, title=attribute, color="#ff9999")
-        
-        # Add edge
-        net.add_edge(entity, attribute, label=relationship, title=rel['description'])
+    for node, data in graph.nodes(data=True):
+        options = {'size': data['size']} if 'size' in data else {}
+        x, y = positions[node]
+        net.add_node(
+            node, label=data['label'], title=data['title'], color=data['color'],
+            x=x, y=y, physics=False, **options
+        )
+    
+    for source, target, data in graph.edges(data=True):
+        net.add_edge(
+            source, target,
+            label=", ".join(data['relationships']),
+            title="\n".join(data['relationships'].values()),
+            value=data['weight']
+        )
+    
+    # Render straight to a string instead of round-tripping through a temp file
+    return net.generate_html()
+
+@st.cache_data(max_entries=8, show_spinner="Computing graph analytics...")
+def load_analytics(kb_hash, _kb):
+    """Compute graph analytics once per KB"""
+    return compute_analytics(
+        load_graph(kb_hash, _kb),
+        communities=load_communities(kb_hash, _kb)
+    )
+
+def show_analytics(analytics):
+    """Render the graph analytics panel"""
+    import pandas as pd
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Nodes", analytics['nodes'])
+    col2.metric("Edges", analytics['edges'])
+    col3.metric("Connected components", analytics['components'])
+    col4.metric("Communities", analytics['communities'])
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Largest component", analytics['largest_component'])
+    col2.metric("Modularity", f"{analytics['modularity']:.3f}")
+    col3.metric("Density", f"{analytics['density']:.5f}")
+    
+    if analytics['betweenness_samples']:
+        st.caption(f"Betweenness centrality is estimated from {analytics['betweenness_samples']} sampled source nodes")
     
-    # Generate the HTML file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.html') as tmp_file:
-        net.save_graph(tmp_file.name)
-        return tmp_file.name
+    col1, col2, col3 = st.columns(3)
+    for col, key, title in [
+        (col1, 'top_degree', "Degree"),
+        (col2, 'top_pagerank', "PageRank"),
+        (col3, 'top_betweenness', "Betweenness")
+    ]:
+        with col:
+            st.subheader(title)
+            st.dataframe(
+                pd.DataFrame(analytics[key], columns=['node', 'score']),
+                column_config={"node": "Node", "score": "Score"},
+                hide_index=True
+            )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Largest components")
+        st.bar_chart(analytics['component_sizes'])
+    with col2:
+        st.subheader("Largest communities")
+        st.bar_chart(analytics['community_sizes'])
 
-def create_markdown_doc(keywords, relationships, headings):
-    """Create a markdown document from the knowledge base"""
-    md_content = "# Knowledge Base\n\n"
-    
-    # Add keywords section
-    md_content += "## Keywords\n"
-    md_content += ", ".join(keywords.split(", ")) + "\n\n"
-    
-    # Add relationships section
-    md_content += "## Relationships\n\n"
-    for rel in relationships:
-        md_content += f"### {rel['entity']}\n"
-        md_content += f"- {rel['relationship']} {rel['attribute']}\n"
-        md_content += f"- Description: {rel['description']}\n\n"
-    
-    # Add headings section
-    md_content += "## Document Structure\n\n"
-    for heading in headings:
-        prefix = "#" * (int(heading['heading'][1]) + 1)
-        md_content += f"{prefix} {heading['value']}\n"
-    
-    return md_content
+def graph_controls(kb):
+    """Render level-of-detail controls and return the chosen render options"""
+    graph = load_graph(kb.content_hash, kb)
+    st.caption(f"{graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges after merging case variants")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        mode = st.selectbox(
+            "Level of detail",
+            list(REDUCTION_MODES),
+            index=0 if graph.number_of_nodes() <= DEFAULT_MAX_NODES else 2,
+            format_func=REDUCTION_MODES.get
+        )
+    with col2:
+        max_nodes = st.number_input("Node budget", min_value=10, max_value=5000, value=DEFAULT_MAX_NODES, step=50)
+    with col3:
+        max_edges = st.number_input("Edge budget", min_value=10, max_value=20000, value=DEFAULT_MAX_EDGES, step=100)
+    
+    types = st.multiselect("Relationship types (empty shows all)", relationship_types(graph))
+    types = tuple(sorted(types))
+    
+    expanded = ()
+    if mode == 'communities':
+        communities = load_communities(kb.content_hash, kb, types)
+        expanded = st.multiselect(
+            "Expand communities",
+            range(len(communities)),
+            format_func=lambda i: community_label(graph, communities[i])
+        )
+        expanded = tuple(sorted(expanded))
+    
+    return {
+        'mode': mode,
+        'max_nodes': int(max_nodes),
+        'max_edges': int(max_edges),
+        'types': types,
+        'expanded': expanded
+    }
+
+PAGE_SIZES = [25, 50, 100, 250]
+SORT_COLUMNS = {
+    None: "Original order",
+    'entity': "Entity",
+    'relationship': "Relationship",
+    'attribute': "Attribute",
+    'description': "Description"
+}
+
+def relationships_table(kb):
+    """Render filter, sort and paging controls and return the visible page
+
+    Filtering and sorting run server-side against the KB's precomputed
+    indexes, so only the rows of the current page are sent to the browser.
+    """
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        entity = st.text_input("Entity contains")
+    with col2:
+        types = st.multiselect("Relationship types", kb.relationship_types())
+    with col3:
+        description = st.text_input("Description contains")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_by = st.selectbox("Sort by", list(SORT_COLUMNS), format_func=SORT_COLUMNS.get)
+    with col2:
+        descending = st.checkbox("Descending", disabled=sort_by is None)
+    with col3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+    
+    matches = kb.query(
+        entity=entity.strip(),
+        relationship_types=types,
+        description=description.strip(),
+        sort_by=sort_by,
+        descending=descending
+    )
+    pages = max(1, -(-len(matches) // page_size))
+    with col4:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+    
+    start = (int(page) - 1) * page_size
+    window = matches[start:start + page_size]
+    if len(matches):
+        st.caption(f"Showing {start + 1}-{start + len(window)} of {len(matches)} relationships ({len(kb)} total)")
+    else:
+        st.caption(f"No relationships match the filters ({len(kb)} total)")
+    return kb.rows_frame(window)
+
+def graph_store_loader():
+    """Sidebar controls to load a subgraph from the persistent graph store"""
+    store = get_graph_store()
+    stats = store.stats()
+    st.sidebar.header("Graph Store")
+    st.sidebar.caption(
+        f"{stats['entities']} entities, {stats['relationships']} relationships from {stats['runs']} runs"
+    )
+    if not stats['runs']:
+        return
+    
+    by = st.sidebar.radio("Query by", ["Keyword", "Entity neighborhood"])
+    if by == "Keyword":
+        keyword = st.sidebar.selectbox("Keyword", store.keywords())
+        if st.sidebar.button("Load subgraph") and keyword:
+            put_state('knowledge_base', store.query_keyword(keyword))
+            st.session_state.pop('knowledge_base_report', None)
+        if keyword:
+            with st.sidebar.expander("Sources"):
+                for run in store.provenance(keyword):
+                    st.write(f"{run['created_at']} ({run['language']})")
+                    for url in run['video_urls']:
+                        st.write(f"- {url}")
+    else:
+        entity = st.sidebar.text_input("Entity")
+        hops = st.sidebar.slider("Hops", min_value=1, max_value=3, value=1)
+        if st.sidebar.button("Load subgraph") and entity:
+            kb = store.query_neighborhood(entity, hops=hops)
+            if kb is None:
+                st.sidebar.error(f"Entity not found: {entity}")
+            else:
+                put_state('knowledge_base', kb)
+                st.session_state.pop('knowledge_base_report', None)
 
 def main():
     check_auth()
@@ -70,90 +260,105 @@ def main():
     if 'knowledge_base' not in st.session_state:
         st.session_state.knowledge_base = None
     
+    graph_store_loader()
+    
     # File uploader for JSON
     uploaded_file = st.file_uploader("Upload Knowledge Base JSON", type=['json'])
-    if uploaded_file:
+    if uploaded_file and st.session_state.get('knowledge_base_upload_id') != uploaded_file.file_id:
+        # Parse each upload once, streaming and validating records as they are read
         try:
-            content = json.load(uploaded_file)
-            if isinstance(content, list) and len(content) == 3:
-                st.session_state.knowledge_base = {
-                    'keywords': content[0],
-                    'relationships': content[1],
-                    'headings': content[2]
-                }
-            else:
-                st.error("Invalid JSON format")
+            kb, report = load_knowledge_base(uploaded_file)
+            put_state('knowledge_base', kb)
+            st.session_state.knowledge_base_upload_id = uploaded_file.file_id
+            st.session_state.knowledge_base_report = report
+        except KnowledgeBaseFormatError as e:
+            st.error(f"Invalid knowledge base JSON: {str(e)}")
         except Exception as e:
             st.error(f"Error loading JSON: {str(e)}")
     
+    report = st.session_state.get('knowledge_base_report')
+    if uploaded_file and report and report['invalid']:
+        st.warning(f"Skipped {report['invalid']} invalid records out of {report['records']} relationships")
+        for error in report['errors']:
+            position = f" at character {error['offset']}" if 'offset' in error else ""
+            st.write(f"- {error['section']}[{error['index']}]{position}: {error['message']}")
+    
     # Display knowledge base if available
-    if st.session_state.knowledge_base:
-        kb = st.session_state.knowledge_base
+    kb = get_state('knowledge_base')
+    if kb is not None:
         
         # Create tabs for different views
-        tab1, tab2, tab3, tab4 = st.tabs([
+        # Tabs track their selection so only the open one renders; the graph,
+        # table and analytics tabs pull in networkx, pyvis and pandas
+        tab1, tab2, tab3, tab4, tab5 = st.tabs([
             "Overview", 
             "Knowledge Graph", 
             "Relationships Table", 
-            "Document Structure"
-        ])
+            "Document Structure",
+            "Analytics"
+        ], key="knowledge_base_tab", on_change="rerun")
         
         with tab1:
-            st.header("Keywords")
-            st.write(kb['keywords'])
-            
-            # Download buttons
-            col1, col2 = st.columns(2)
-            with col1:
-                # Download JSON
-                st.download_button(
-                    label="Download JSON",
-                    data=json.dumps(kb, indent=2),
-                    file_name="knowledge_base.json",
-                    mime="application/json"
-                )
+            if tab1.open:
+                st.header("Keywords")
+                st.write(kb.keywords)
             
-            with col2:
-                # Download Markdown
-                md_content = create_markdown_doc(
-                    kb['keywords'],
-                    kb['relationships'],
-                    kb['headings']
-                )
-                st.download_button(
-                    label="Download Markdown",
-                    data=md_content,
-                    file_name="knowledge_base.md",
-                    mime="text/markdown"
-                )
+                # Exports are generated only on request and cached per KB hash
+                col1, col2 = st.columns(2)
+                with col1:
+                    fmt = st.selectbox(
+                        "Export format",
+                        list(EXPORT_FORMATS),
+                        format_func=lambda f: EXPORT_FORMATS[f]['label']
+                    )
+                path = cached_export_path(kb, fmt)
+                with col2:
+                    if not os.path.exists(path):
+                        if st.button("Prepare Export"):
+                            with st.spinner("Writing export..."):
+                                path = export_knowledge_base(kb, fmt)
+                    if os.path.exists(path):
+                        # The file is read only when the button is clicked, not on every rerun
+                        st.download_button(
+                            label=f"Download {EXPORT_FORMATS[fmt]['label']}",
+                            data=lambda: read_export(kb, fmt),
+                            file_name=f"knowledge_base.{EXPORT_FORMATS[fmt]['extension']}",
+                            mime=EXPORT_FORMATS[fmt]['mime']
+                        )
         
         with tab2:
-            st.header("Knowledge Graph")
-            graph_file = visualize_knowledge_graph(kb['relationships'])
-            with open(graph_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            st.components.v1.html(html_content, height=800)
-            os.unlink(graph_file)
+            if tab2.open:
+                st.header("Knowledge Graph")
+                options = graph_controls(kb)
+                html_content = visualize_knowledge_graph(kb.content_hash, kb, **options)
+                st.components.v1.html(html_content, height=800)
         
         with tab3:
-            st.header("Relationships")
-            df = pd.DataFrame(kb['relationships'])
-            st.dataframe(
-                df,
-                column_config={
-                    "entity": "Entity",
-                    "relationship": "Relationship",
-                    "attribute": "Attribute",
-                    "description": "Description"
-                },
-                hide_index=True
-            )
+            if tab3.open:
+                st.header("Relationships")
+                rows = relationships_table(kb)
+                st.dataframe(
+                    rows,
+                    column_config={
+                        "entity": "Entity",
+                        "relationship": "Relationship",
+                        "attribute": "Attribute",
+                        "description": "Description"
+                    },
+                    hide_index=True
+                )
         
         with tab4:
-            st.header("Document Structure")
-            for heading in kb['headings']:
-                level = int(heading['heading'][1])
-                st.markdown(f"{'#' * level} {heading['value']}")
+            if tab4.open:
+                st.header("Document Structure")
+                for heading in kb.headings:
+                    level = int(heading['heading'][1])
+                    st.markdown(f"{'#' * level} {heading['value']}")
+        
+        with tab5:
+            if tab5.open:
+                st.header("Graph Analytics")
+                show_analytics(load_analytics(kb.content_hash, kb))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    run_page("Knowledge Base Viewer", main) 
\ No newline at end of file
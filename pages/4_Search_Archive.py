@@ -0,0 +1,70 @@
+import streamlit as st
+from search_index import get_search_index
+from graph_store import get_graph_store
+from audio_fingerprint import get_fingerprint_index
+from profiling import run_page
+
+def check_auth():
+    """Check if user is authenticated"""
+    if "password_correct" not in st.session_state:
+        st.error("Please log in first")
+        st.stop()
+    if not st.session_state["password_correct"]:
+        st.error("Please log in first")
+        st.stop()
+
+def format_timestamp(seconds):
+    """Format seconds as H:MM:SS or M:SS"""
+    seconds = int(seconds or 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+def main():
+    check_auth()
+    
+    st.title("Search Archive")
+    
+    index = get_search_index()
+    # Transcripts and knowledge bases stored before the index existed are
+    # added once automatically; the sidebar action reruns it on demand
+    reindex = st.sidebar.button("Reindex archive")
+    if reindex or index.stats()['documents'] == 0:
+        with st.spinner("Indexing stored transcripts and knowledge bases..."):
+            added = index.rebuild_from(get_graph_store(), get_fingerprint_index())
+        if reindex or added['videos'] or added['keywords']:
+            st.sidebar.success(f"Indexed {added['videos']} new videos and {added['keywords']} knowledge bases")
+    stats = index.stats()
+    st.caption(f"{stats['documents']} indexed passages from {stats['videos']} videos")
+    
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        query = st.text_input("Search transcripts and knowledge bases")
+    with col2:
+        scope = st.selectbox("Search in", ["Everything", "Transcripts", "Knowledge bases"])
+    with col3:
+        limit = st.selectbox("Results", [20, 50, 100])
+    
+    if not query:
+        return
+    
+    kinds = {
+        "Everything": None,
+        "Transcripts": ['segment', 'transcript'],
+        "Knowledge bases": ['relationship']
+    }[scope]
+    results = index.search(query, limit=limit, kinds=kinds)
+    if not results:
+        st.warning("No matches found")
+        return
+    
+    for result in results:
+        if result['kind'] == 'relationship':
+            st.markdown(f"**{result['title']}** (knowledge base: {result['keyword']})")
+        else:
+            st.markdown(f"**[{result['title'] or result['video_id']} @ {format_timestamp(result['start'])}]({result['url']})**")
+        st.write(result['snippet'])
+        st.divider()
+
+if __name__ == "__main__":
+    run_page("Search Archive", main)
@@ -0,0 +1,184 @@
+import cProfile
+import marshal
+import os
+import pstats
+import threading
+import time
+from collections import deque
+import streamlit as st
+from settings import get_settings
+
+MAX_PROFILES = 20
+TOP_FUNCTIONS = 30
+
+# Call tree rendering: how deep to expand and the smallest share of the run
+# a call must take to be shown
+TREE_DEPTH = 10
+TREE_MIN_SHARE = 0.01
+
+# Only one cProfile profiler can be active per process on Python 3.12+, so a
+# run that starts while another session's run is being profiled goes unprofiled
+_profiler_lock = threading.Lock()
+
+def profiling_allowed():
+    """Whether the ALLOW_PROFILING admin setting is on"""
+    return str(get_settings()['allow_profiling']).lower() in ('1', 'true', 'yes', 'on')
+
+def profiling_enabled():
+    """Whether profiling is allowed and this session turned it on from the sidebar"""
+    return bool(
+        st.session_state.get('profiling_enabled') and st.session_state.get('password_correct')
+        and profiling_allowed()
+    )
+
+def _start_profiler():
+    """An enabled profiler holding the profiler lock, or None if profiling is taken"""
+    if not _profiler_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool, such as a debugger or coverage, is active
+        _profiler_lock.release()
+        return None
+    return profiler
+
+def run_page(page, main):
+    """Run a page's main(), under cProfile when profiling is enabled
+
+    With profiling off this costs one session state lookup per rerun.
+    """
+    if not profiling_enabled():
+        return main()
+    profiler = _start_profiler()
+    if profiler is None:
+        st.session_state['profiles_skipped'] = st.session_state.get('profiles_skipped', 0) + 1
+        return main()
+    start = time.perf_counter()
+    try:
+        return main()
+    finally:
+        # st.stop() and st.rerun() end a run by raising, so record it regardless
+        profiler.disable()
+        _profiler_lock.release()
+        _record(page, time.perf_counter() - start, profiler)
+
+def _record(page, duration, profiler):
+    if 'profiles' not in st.session_state:
+        st.session_state['profiles'] = deque(maxlen=MAX_PROFILES)
+    st.session_state['profiles'].appendleft({
+        'page': page,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'duration': duration,
+        'stats': pstats.Stats(profiler).stats
+    })
+
+def recent_profiles():
+    """This session's stored profiles, newest first"""
+    return list(st.session_state.get('profiles', ()))
+
+def clear_profiles():
+    st.session_state.pop('profiles', None)
+    st.session_state.pop('profiles_skipped', None)
+
+def _function_name(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+def top_functions(profile, limit=TOP_FUNCTIONS, sort='cumulative'):
+    """Rows of the most expensive functions by cumulative or own time"""
+    rows = [{
+        'function': _function_name(func),
+        'calls': nc,
+        'own_s': tt,
+        'cumulative_s': ct,
+        'per_call_ms': 1000 * ct / nc if nc else 0.0
+    } for func, (cc, nc, tt, ct, callers) in profile['stats'].items()]
+    key = 'cumulative_s' if sort == 'cumulative' else 'own_s'
+    return sorted(rows, key=lambda row: row[key], reverse=True)[:limit]
+
+def call_tree(profile, depth=TREE_DEPTH, min_share=TREE_MIN_SHARE):
+    """Indented text call tree, the heaviest paths first, as a flame-graph summary
+
+    cProfile only records caller/callee pairs, so a function's time under a
+    caller is the cumulative time of that pair, not of one exact stack.
+    """
+    stats = profile['stats']
+    children = {}
+    for callee, (cc, nc, tt, ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((callee, edge[3]))
+    roots = sorted(
+        ((func, value[3]) for func, value in stats.items() if not value[4]),
+        key=lambda item: item[1], reverse=True
+    )
+    total = profile['duration'] or sum(ct for _, ct in roots) or 1.0
+
+    lines = []
+
+    def walk(func, cumulative, level, path):
+        if cumulative < total * min_share:
+            return
+        lines.append(f"{'  ' * level}{cumulative:8.3f}s {100 * cumulative / total:5.1f}%  {_function_name(func)}")
+        if level + 1 >= depth:
+            return
+        for child, child_time in sorted(children.get(func, []), key=lambda item: item[1], reverse=True):
+            if child not in path:
+                walk(child, child_time, level + 1, path | {child})
+
+    for func, cumulative in roots:
+        walk(func, cumulative, 0, {func})
+    return "\n".join(lines)
+
+def profile_bytes(profile):
+    """The profile in the .prof format read by pstats, snakeviz and similar tools"""
+    return marshal.dumps(profile['stats'])
+
+def profiles_panel():
+    """Recent page profiles with their top functions and call tree"""
+    st.header("Page Profiles")
+    profiles = recent_profiles()
+    skipped = st.session_state.get('profiles_skipped', 0)
+    if skipped:
+        st.caption(f"{skipped} runs were not profiled because another session's run was being profiled")
+    if not profiles:
+        st.info("No profiles yet. Open a page while profiling is enabled.")
+        return
+
+    index = st.selectbox(
+        "Profile",
+        range(len(profiles)),
+        format_func=lambda i: f"{profiles[i]['timestamp']}  {profiles[i]['page']}  ({profiles[i]['duration']:.2f} s)"
+    )
+    profile = profiles[index]
+
+    sort = st.radio("Sort by", ["cumulative", "own"], horizontal=True, format_func=lambda s: f"{s.capitalize()} time")
+    st.dataframe(
+        top_functions(profile, sort=sort),
+        column_config={
+            "function": "Function",
+            "calls": "Calls",
+            "own_s": st.column_config.NumberColumn("Own (s)", format="%.4f"),
+            "cumulative_s": st.column_config.NumberColumn("Cumulative (s)", format="%.4f"),
+            "per_call_ms": st.column_config.NumberColumn("Per call (ms)", format="%.3f")
+        },
+        hide_index=True
+    )
+    with st.expander("Call tree"):
+        st.code(call_tree(profile), language=None)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Download .prof",
+            data=profile_bytes(profile),
+            file_name=f"{profile['page'].lower().replace(' ', '_')}_{profile['timestamp'].replace(' ', '_')}.prof",
+            mime="application/octet-stream"
+        )
+    with col2:
+        if st.button("Clear Profiles"):
+            clear_profiles()
+            st.rerun()
@@ -0,0 +1,152 @@
+import math
+import re
+
+TRANSCRIPTION_MODEL = "whisper-large-v3-turbo"
+
+# Groq list prices in USD per hour of audio; each request is billed for at
+# least MIN_BILLED_SECONDS
+GROQ_PRICE_PER_HOUR = {
+    'whisper-large-v3-turbo': 0.04,
+    'whisper-large-v3': 0.111
+}
+MIN_BILLED_SECONDS = 10
+
+# Rough processing cost of one video, used for estimates and timeouts:
+# fixed seconds per job plus seconds per minute of audio for each stage
+JOB_OVERHEAD = 10
+CONVERSION_SECONDS_PER_MINUTE = 1.5
+DOWNLOAD_SECONDS_PER_MINUTE = 0.5
+TRANSCODE_SECONDS_PER_MINUTE = 0.5
+TRANSCRIPTION_SECONDS_PER_MINUTE = 0.3
+
+# Per-job timeouts grow with the video's length between these bounds (seconds)
+TIMEOUT_FACTOR = 3
+MIN_CONVERSION_TIMEOUT = 60
+MAX_CONVERSION_TIMEOUT = 30 * 60
+MIN_TRANSCRIPTION_TIMEOUT = 120
+MAX_TRANSCRIPTION_TIMEOUT = 30 * 60
+
+SCHEDULES = {
+    'selection': "Selection order",
+    'shortest': "Shortest first",
+    'deadline': "Shortest first within a deadline"
+}
+
+_SUFFIXES = {'k': 1e3, 'thousand': 1e3, 'm': 1e6, 'million': 1e6, 'b': 1e9, 'billion': 1e9}
+_COUNT = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(thousand|million|billion|k|m|b)?\b')
+
+def parse_duration(text):
+    """Seconds in a "H:MM:SS" or "M:SS" length, or None for live or missing lengths"""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return int(text)
+    parts = str(text).strip().split(':')
+    if not all(part.isdigit() for part in parts) or len(parts) > 3:
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+def parse_count(text):
+    """Integer from a view count such as "1234567", "1,234,567 views", "1.2M views" or "1.2 billion views" """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return int(text)
+    match = _COUNT.search(str(text).lower())
+    if not match:
+        return None
+    number, suffix = match.groups()
+    # Commas only ever separate thousands; a point is a decimal point
+    return round(float(number.replace(',', '')) * _SUFFIXES.get(suffix, 1))
+
+def annotate_result(item):
+    """Add numeric duration_seconds and view_count fields to a yt-api search item"""
+    item['duration_seconds'] = parse_duration(item.get('lengthSeconds') or item.get('lengthText'))
+    item['view_count'] = parse_count(item.get('viewCount'))
+    return item
+
+def format_duration(seconds):
+    if seconds is None:
+        return "unknown"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+def estimate_job_seconds(duration):
+    """Expected wall-clock seconds to convert, download, transcode and transcribe one video"""
+    per_minute = (
+        CONVERSION_SECONDS_PER_MINUTE + DOWNLOAD_SECONDS_PER_MINUTE +
+        TRANSCODE_SECONDS_PER_MINUTE + TRANSCRIPTION_SECONDS_PER_MINUTE
+    )
+    return JOB_OVERHEAD + per_minute * (duration or 0) / 60
+
+def transcription_cost(duration, model):
+    """Groq cost in USD of transcribing `duration` seconds of audio"""
+    price = GROQ_PRICE_PER_HOUR.get(model)
+    if price is None or duration is None:
+        return None
+    return max(duration, MIN_BILLED_SECONDS) / 3600 * price
+
+def estimate_basket(videos, model=TRANSCRIPTION_MODEL):
+    """Total audio minutes, Groq cost and wall-clock seconds for processing videos one after another
+
+    Videos without a known duration are counted in `unknown` and left out of the totals.
+    """
+    known = [v['duration_seconds'] for v in videos if v.get('duration_seconds') is not None]
+    costs = [transcription_cost(duration, model) for duration in known]
+    return {
+        'videos': len(videos),
+        'unknown': len(videos) - len(known),
+        'audio_minutes': sum(known) / 60,
+        'cost': sum(c for c in costs if c is not None),
+        'wall_seconds': sum(estimate_job_seconds(v.get('duration_seconds')) for v in videos)
+    }
+
+def schedule(videos, order='shortest', deadline=None):
+    """Order videos for processing; returns (scheduled, deferred)
+
+    'shortest' runs the shortest videos first so one long video cannot hold up
+    the rest; unknown lengths go last. 'deadline' does the same but defers
+    videos that are not expected to finish within `deadline` seconds.
+    """
+    if order == 'selection':
+        return list(videos), []
+    ordered = sorted(
+        videos,
+        key=lambda v: (v.get('duration_seconds') is None, v.get('duration_seconds') or 0)
+    )
+    if order != 'deadline' or deadline is None:
+        return ordered, []
+    scheduled, deferred, elapsed = [], [], 0.0
+    for video in ordered:
+        expected = estimate_job_seconds(video.get('duration_seconds'))
+        if elapsed + expected <= deadline:
+            scheduled.append(video)
+            elapsed += expected
+        else:
+            deferred.append(video)
+    return scheduled, deferred
+
+def _timeout(duration, minimum, maximum, seconds_per_minute):
+    if duration is None:
+        return minimum
+    return min(maximum, max(minimum, TIMEOUT_FACTOR * seconds_per_minute * duration / 60))
+
+def conversion_timeout(duration):
+    """Seconds to keep polling the conversion API for a video of this length"""
+    return _timeout(duration, MIN_CONVERSION_TIMEOUT, MAX_CONVERSION_TIMEOUT, CONVERSION_SECONDS_PER_MINUTE)
+
+def transcription_timeout(duration):
+    """Seconds to allow the Groq request for a video of this length"""
+    return _timeout(
+        duration, MIN_TRANSCRIPTION_TIMEOUT, MAX_TRANSCRIPTION_TIMEOUT,
+        DOWNLOAD_SECONDS_PER_MINUTE + TRANSCRIPTION_SECONDS_PER_MINUTE
+    )
+
+def conversion_attempts(duration, interval):
+    """Conversion polls that fit in the video's conversion timeout"""
+    return max(1, math.ceil(conversion_timeout(duration) / interval))
@@ -0,0 +1,179 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import streamlit as st
+from settings import get_settings, on_reload
+from knowledge_base import canonical_name
+
+DEFAULT_RESULT_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    video_id TEXT,
+    title TEXT,
+    start REAL,
+    keyword TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_video ON documents(video_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    text, title, content='documents', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, text, title) VALUES (new.id, new.text, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, text, title) VALUES ('delete', old.id, old.text, old.title);
+END;
+"""
+
+def video_link(video_id, start=None):
+    """YouTube URL for a video, optionally deep-linked to a timestamp"""
+    url = f"https://youtube.com/watch?v={video_id}"
+    if start:
+        url += f"&t={int(start)}s"
+    return url
+
+def _segment_fields(segment):
+    """Read start and text from a Groq segment (dict or object)"""
+    if isinstance(segment, dict):
+        return segment.get('start', 0), segment.get('text', '')
+    return getattr(segment, 'start', 0), getattr(segment, 'text', '')
+
+def fts_query(text):
+    """Quote each term so user input is never parsed as FTS5 syntax"""
+    terms = ['"' + term.replace('"', '""') + '"' for term in text.split()]
+    return " ".join(terms)
+
+class SearchIndex:
+    """SQLite FTS5 index over transcripts, segments and KB relationships"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add_transcript(self, video_id, title, text, segments=None):
+        """Index a video's transcript, replacing what was indexed for it before
+
+        With timestamped segments each one becomes its own document so results
+        can link to the matching moment; otherwise the whole transcript is a
+        single document starting at 0.
+        """
+        if segments:
+            rows = [
+                (f"{video_id}:{i}", 'segment', video_id, title, float(start or 0), None, seg_text.strip())
+                for i, (start, seg_text) in enumerate(_segment_fields(s) for s in segments)
+                if seg_text and seg_text.strip()
+            ]
+        else:
+            rows = [(f"{video_id}:0", 'transcript', video_id, title, 0.0, None, text)]
+
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM documents WHERE video_id = ?", (video_id,))
+            conn.executemany(
+                "INSERT INTO documents (doc_key, kind, video_id, title, start, keyword, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def add_relationships(self, kb, keyword):
+        """Index relationship descriptions of a knowledge base under its keyword"""
+        canonical_keyword = canonical_name(keyword)
+        rows = []
+        for rel in kb.relationships:
+            key = "|".join(canonical_name(rel[f]) for f in ('entity', 'relationship', 'attribute'))
+            rows.append((
+                f"rel:{canonical_keyword}:{key}", 'relationship', None,
+                f"{rel['entity']} {rel['relationship']} {rel['attribute']}",
+                None, keyword, rel['description']
+            ))
+        with self.lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO documents (doc_key, kind, video_id, title, start, keyword, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def rebuild_from(self, graph_store, fingerprint_index):
+        """Backfill the index from transcripts and knowledge bases stored before it existed
+
+        Videos that are already indexed keep their timestamped segments; the
+        stored transcripts have none, so they are indexed as whole documents.
+        Returns the number of videos and keywords added.
+        """
+        with self._connect() as conn:
+            indexed = {r[0] for r in conn.execute("SELECT DISTINCT video_id FROM documents WHERE video_id IS NOT NULL")}
+        videos = 0
+        for video_id, transcript in fingerprint_index.transcripts():
+            if video_id not in indexed and transcript.strip():
+                self.add_transcript(video_id, None, transcript)
+                videos += 1
+        keywords = graph_store.keywords()
+        for keyword in keywords:
+            # SQLite treats a negative LIMIT as no limit
+            self.add_relationships(graph_store.query_keyword(keyword, limit=-1), keyword)
+        return {'videos': videos, 'keywords': len(keywords)}
+
+    def search(self, text, limit=DEFAULT_RESULT_LIMIT, kinds=None):
+        """Return the best BM25 matches for a query, best first"""
+        query = fts_query(text)
+        if not query:
+            return []
+        sql = """
+            SELECT d.kind, d.video_id, d.title, d.start, d.keyword,
+                   snippet(documents_fts, 0, '**', '**', '...', 16),
+                   bm25(documents_fts) AS score
+            FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+            WHERE documents_fts MATCH ?
+        """
+        params = [query]
+        if kinds:
+            sql += f" AND d.kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{
+            'kind': kind,
+            'video_id': video_id,
+            'title': title,
+            'start': start,
+            'keyword': keyword,
+            'snippet': snippet,
+            'score': -score,
+            'url': video_link(video_id, start) if video_id else None
+        } for kind, video_id, title, start, keyword, snippet, score in rows]
+
+    def stats(self):
+        """Number of indexed documents and videos"""
+        with self._connect() as conn:
+            documents, videos = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT video_id) FROM documents"
+            ).fetchone()
+        return {'documents': documents, 'videos': videos}
+
+@st.cache_resource
+def get_search_index():
+    """Process-wide search index"""
+    return SearchIndex(get_settings()['search_index_path'])
+
+on_reload(get_search_index.clear)
@@ -0,0 +1,281 @@
+import mmap
+import os
+import pickle
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from settings import get_settings, on_reload
+
+# Session directories untouched for this long belong to sessions that have
+# ended; they are removed at most once per PRUNE_INTERVAL
+SESSION_TTL_SECONDS = 6 * 60 * 60
+PRUNE_INTERVAL = 10 * 60
+
+class StoredValue:
+    """Handle kept in session state for a value offloaded to the session store"""
+
+    def __init__(self, session_id, key, path, kind, size, pickle_size=0, buffers=()):
+        self.session_id = session_id
+        self.key = key
+        self.path = path
+        self.kind = kind
+        self.size = size
+        self.pickle_size = pickle_size
+        self.buffers = list(buffers)
+
+    def __repr__(self):
+        return f"<{self.key}: {self.size} bytes in the session store>"
+
+def _serialize(value):
+    """(kind, data, out-of-band buffers) for a value; strings are stored as plain UTF-8"""
+    if isinstance(value, str):
+        return 'text', value.encode('utf-8'), []
+    buffers = []
+    data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    return 'pickle', data, [buffer.raw() for buffer in buffers]
+
+class SessionStore:
+    """Shared on-disk store for large session state values
+
+    Values of at least `offload_bytes` serialized are written under
+    store_dir/<session id>/ and replaced in session state by a StoredValue.
+    Reads map the file, so NumPy arrays are unpickled in place rather than
+    copied. Decoded values stay in memory while they fit `session_budget_bytes`
+    per session and `global_budget_bytes` overall, least recently used out
+    first. The most recently used value is always kept, even when it alone
+    is over a budget, so a large knowledge base keeps its derived caches
+    between reruns. Stored values are treated as read-only.
+    """
+
+    def __init__(self, store_dir, offload_bytes, session_budget_bytes, global_budget_bytes):
+        self.store_dir = store_dir
+        self.offload_bytes = offload_bytes
+        self.session_budget_bytes = session_budget_bytes
+        self.global_budget_bytes = global_budget_bytes
+        self.lock = threading.Lock()
+        self.resident = OrderedDict()
+        self.resident_bytes = {}
+        self.values = {}
+        self.last_prune = 0
+        os.makedirs(store_dir, exist_ok=True)
+        self.prune()
+
+    def put(self, session_id, key, value):
+        """What to keep in session state for a value: the value itself if small, else a StoredValue"""
+        self.discard(session_id, key)
+        if value is None:
+            return None
+        kind, data, buffers = _serialize(value)
+        size = len(data) + sum(buffer.nbytes for buffer in buffers)
+        if size < self.offload_bytes:
+            with self.lock:
+                self.values.setdefault(session_id, {})[key] = (size, None)
+            return value
+
+        directory = os.path.join(self.store_dir, session_id)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{key}-{uuid.uuid4().hex}.bin")
+        layout, offset = [], len(data)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(data)
+            for buffer in buffers:
+                f.write(buffer)
+                layout.append((offset, buffer.nbytes))
+                offset += buffer.nbytes
+        os.replace(f"{path}.tmp", path)
+
+        handle = StoredValue(session_id, key, path, kind, size, len(data), layout)
+        with self.lock:
+            self.values.setdefault(session_id, {})[key] = (size, path)
+            self._keep(handle, value)
+        if time.time() - self.last_prune > PRUNE_INTERVAL:
+            self.prune()
+        return handle
+
+    def get(self, handle):
+        """Value behind a StoredValue, or None if its file is gone"""
+        # Every read counts as activity, from memory or disk, so the session is not pruned
+        try:
+            os.utime(os.path.dirname(handle.path))
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            entry = self.resident.get(handle.path)
+            if entry is not None:
+                self.resident.move_to_end(handle.path)
+                return entry[1]
+        try:
+            value = self._read(handle)
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            self._keep(handle, value)
+        return value
+
+    def _read(self, handle):
+        with open(handle.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if handle.kind == 'text':
+            try:
+                return str(mapped, 'utf-8')
+            finally:
+                mapped.close()
+        # Out-of-band buffers stay views of the mapping, which lives as long as they do
+        view = memoryview(mapped)
+        return pickle.loads(
+            view[:handle.pickle_size],
+            buffers=[view[offset:offset + size] for offset, size in handle.buffers]
+        )
+
+    def _keep(self, handle, value):
+        """Hold a decoded value in memory, evicting others to stay within the budgets"""
+        self._drop(handle.path)
+        self.resident[handle.path] = (handle.session_id, value, handle.size)
+        self.resident_bytes[handle.session_id] = self.resident_bytes.get(handle.session_id, 0) + handle.size
+        for path, (session_id, _, _) in list(self.resident.items()):
+            over_session = self.resident_bytes[handle.session_id] > self.session_budget_bytes
+            over_global = sum(self.resident_bytes.values()) > self.global_budget_bytes
+            if not over_session and not over_global:
+                break
+            if path != handle.path and (over_global or session_id == handle.session_id):
+                self._drop(path)
+
+    def _drop(self, path):
+        entry = self.resident.pop(path, None)
+        if entry is not None:
+            session_id, _, size = entry
+            self.resident_bytes[session_id] -= size
+            if not self.resident_bytes[session_id]:
+                del self.resident_bytes[session_id]
+
+    def discard(self, session_id, key):
+        """Forget a session's value and remove its file"""
+        with self.lock:
+            entry = self.values.get(session_id, {}).pop(key, None)
+            if entry is None or entry[1] is None:
+                return
+            self._drop(entry[1])
+        try:
+            os.remove(entry[1])
+        except FileNotFoundError:
+            pass
+
+    def prune(self):
+        """Remove the files of sessions inactive for SESSION_TTL_SECONDS"""
+        self.last_prune = time.time()
+        cutoff = self.last_prune - SESSION_TTL_SECONDS
+        for name in os.listdir(self.store_dir):
+            directory = os.path.join(self.store_dir, name)
+            try:
+                if os.path.getmtime(directory) >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            with self.lock:
+                self.values.pop(name, None)
+                for path in [p for p, entry in self.resident.items() if entry[0] == name]:
+                    self._drop(path)
+
+    def usage(self, session_id):
+        """Bytes a session holds in session state, on disk and decoded in memory"""
+        with self.lock:
+            values = dict(self.values.get(session_id, {}))
+            resident = self.resident_bytes.get(session_id, 0)
+        return {
+            'values': len(values),
+            'inline_bytes': sum(size for size, path in values.values() if path is None),
+            'offloaded_bytes': sum(size for size, path in values.values() if path is not None),
+            'resident_bytes': resident,
+            'budget_bytes': self.session_budget_bytes
+        }
+
+    def report(self):
+        """Usage of every session with stored values, largest first"""
+        with self.lock:
+            sessions = list(self.values)
+        rows = [dict(self.usage(session_id), session=session_id) for session_id in sessions]
+        return sorted(rows, key=lambda r: r['inline_bytes'] + r['offloaded_bytes'], reverse=True)
+
+@st.cache_resource
+def get_session_store():
+    """Process-wide session store"""
+    settings = get_settings()
+    mb = 1024 * 1024
+    return SessionStore(
+        settings['session_store_dir'],
+        int(float(settings['session_offload_kb']) * 1024),
+        int(float(settings['session_budget_mb']) * mb),
+        int(float(settings['session_global_budget_mb']) * mb)
+    )
+
+on_reload(get_session_store.clear)
+
+def _session_id():
+    """Store ID of the current session, or None outside a Streamlit script run"""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    if 'session_store_id' not in st.session_state:
+        st.session_state.session_store_id = uuid.uuid4().hex
+    return st.session_state.session_store_id
+
+def put_state(key, value):
+    """Set a session state value, offloading it to the session store when large"""
+    session_id = _session_id()
+    if session_id is not None:
+        value = get_session_store().put(session_id, key, value)
+    st.session_state[key] = value
+
+def get_state(key, default=None):
+    """Session state value, read back from the session store if it was offloaded"""
+    value = st.session_state.get(key, default)
+    if isinstance(value, StoredValue):
+        value = get_session_store().get(value)
+        if value is None:
+            st.session_state.pop(key, None)
+            return default
+    return value
+
+def pop_state(key):
+    """Remove a session state value and any offloaded copy"""
+    session_id = _session_id()
+    if session_id is not None:
+        get_session_store().discard(session_id, key)
+    st.session_state.pop(key, None)
+
+def storage_sidebar():
+    """Sidebar report of session state held by each session"""
+    store = get_session_store()
+    kb = 1024
+    with st.sidebar.expander("Session Storage"):
+        usage = store.usage(_session_id())
+        st.write(
+            f"This session: {(usage['inline_bytes'] + usage['offloaded_bytes']) / kb:.0f} KB stored, "
+            f"{usage['resident_bytes'] / kb:.0f} KB of {usage['budget_bytes'] / kb:.0f} KB in memory"
+        )
+        rows = store.report()
+        if not rows:
+            return
+        st.dataframe(
+            [{
+                'session': row['session'][:8],
+                'values': row['values'],
+                'inline_kb': row['inline_bytes'] / kb,
+                'offloaded_kb': row['offloaded_bytes'] / kb,
+                'resident_kb': row['resident_bytes'] / kb
+            } for row in rows],
+            column_config={
+                "session": "Session",
+                "values": "Values",
+                "inline_kb": st.column_config.NumberColumn("Inline (KB)", format="%.0f"),
+                "offloaded_kb": st.column_config.NumberColumn("On disk (KB)", format="%.0f"),
+                "resident_kb": st.column_config.NumberColumn("In memory (KB)", format="%.0f")
+            },
+            hide_index=True
+        )
+        total = sum(row['resident_bytes'] for row in rows)
+        st.write(f"All sessions: {total / kb:.0f} KB of {store.global_budget_bytes / kb:.0f} KB in memory")
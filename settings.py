@@ -0,0 +1,138 @@
+import os
+import threading
+import requests
+import streamlit as st
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+import config
+
+# Each setting is resolved once per process from Streamlit secrets, then
+# environment variables (including .env), then the defaults in config.py.
+# Entries are (secrets section, secrets key, environment variable, config attribute).
+SETTINGS = {
+    'rapidapi_key': ('api_credentials', 'rapidapi_key', 'RAPIDAPI_KEY', 'RAPIDAPI_KEY'),
+    'yt_rapidapi_host': ('api_credentials', 'yt_rapidapi_host', 'YT_RAPIDAPI_HOST', 'RAPIDAPI_HOST_YT_SEARCH'),
+    'mp3_rapidapi_host': ('api_credentials', 'rapidapi_host', 'RAPIDAPI_HOST', 'RAPIDAPI_HOST_YT_MP3'),
+    'groq_api_key': ('api_credentials', 'groq_api_key', 'GROQ_API_KEY', 'GROQ_API_KEY'),
+    'knowledge_base_api_key': ('api_credentials', 'knowledge_base_api_key', 'KNOWLEDGE_BASE_API_KEY', None),
+    'kb_api_endpoint': (None, None, 'KB_API_ENDPOINT', 'KB_API_ENDPOINT'),
+    'yt_api_base_url': (None, None, 'YT_API_BASE_URL', 'YT_API_BASE_URL'),
+    'mp3_api_base_url': (None, None, 'MP3_API_BASE_URL', 'MP3_API_BASE_URL'),
+    'groq_base_url': (None, None, 'GROQ_BASE_URL', 'GROQ_BASE_URL'),
+    'admin_username': ('credentials', 'username', 'ADMIN_USERNAME', None),
+    'admin_password': ('credentials', 'password', 'ADMIN_PASSWORD', None),
+    'fingerprint_db_path': (None, None, 'FINGERPRINT_DB_PATH', 'FINGERPRINT_DB_PATH'),
+    'graph_store_path': (None, None, 'GRAPH_STORE_PATH', 'GRAPH_STORE_PATH'),
+    'search_index_path': (None, None, 'SEARCH_INDEX_PATH', 'SEARCH_INDEX_PATH'),
+    'transcript_index_path': (None, None, 'TRANSCRIPT_INDEX_PATH', 'TRANSCRIPT_INDEX_PATH'),
+    'export_dir': (None, None, 'EXPORT_DIR', 'EXPORT_DIR'),
+    'audio_cache_dir': (None, None, 'AUDIO_CACHE_DIR', 'AUDIO_CACHE_DIR'),
+    'audio_cache_quota_mb': (None, None, 'AUDIO_CACHE_QUOTA_MB', 'AUDIO_CACHE_QUOTA_MB'),
+    'session_store_dir': (None, None, 'SESSION_STORE_DIR', 'SESSION_STORE_DIR'),
+    'session_offload_kb': (None, None, 'SESSION_OFFLOAD_KB', 'SESSION_OFFLOAD_KB'),
+    'session_budget_mb': (None, None, 'SESSION_BUDGET_MB', 'SESSION_BUDGET_MB'),
+    'session_global_budget_mb': (None, None, 'SESSION_GLOBAL_BUDGET_MB', 'SESSION_GLOBAL_BUDGET_MB'),
+    'allow_profiling': (None, None, 'ALLOW_PROFILING', 'ALLOW_PROFILING'),
+    'metrics_file': (None, None, 'METRICS_FILE', 'METRICS_FILE'),
+    'metrics_port': (None, None, 'METRICS_PORT', 'METRICS_PORT')
+}
+
+HTTP_POOL_SIZE = 20
+
+_lock = threading.RLock()
+_settings = None
+_clients = {}
+_reload_hooks = []
+
+def _is_placeholder(value):
+    """config.py ships with 'your_...' placeholders that must not count as keys"""
+    return isinstance(value, str) and value.startswith('your_')
+
+def _resolve(section, key, env_var, config_attr):
+    if section:
+        try:
+            return st.secrets[section][key]
+        except Exception:
+            pass
+    value = os.getenv(env_var)
+    if value:
+        return value
+    if config_attr:
+        value = getattr(config, config_attr, None)
+        if value and not _is_placeholder(value):
+            return value
+    return None
+
+def get_settings():
+    """Resolved settings dict, computed once per process"""
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                load_dotenv()
+                _settings = {name: _resolve(*source) for name, source in SETTINGS.items()}
+    return _settings
+
+def on_reload(hook):
+    """Register a function run by reload_settings(), to rebuild objects made from settings"""
+    _reload_hooks.append(hook)
+    return hook
+
+def reload_settings():
+    """Re-read secrets, environment and config.py, and rebuild clients and stores made from them"""
+    global _settings
+    with _lock:
+        _settings = None
+        _clients.clear()
+    settings = get_settings()
+    for hook in list(_reload_hooks):
+        hook()
+    return settings
+
+def _client(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+    return client
+
+def _new_session(headers=None):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def get_http_session():
+    """Shared pooled HTTP session for RapidAPI and thumbnail requests"""
+    return _client('http', _new_session)
+
+def get_groq_client():
+    """Shared Groq client"""
+    def factory():
+        from groq import Groq
+        settings = get_settings()
+        return Groq(api_key=settings['groq_api_key'], base_url=settings['groq_base_url'])
+    return _client('groq', factory)
+
+def get_kb_client():
+    """Shared HTTP session preconfigured for the knowledge base workflow API"""
+    def factory():
+        return _new_session({
+            'Authorization': f"Bearer {get_settings()['knowledge_base_api_key']}",
+            'Content-Type': 'application/json'
+        })
+    return _client('kb', factory)
+
+def rapidapi_headers(host_setting):
+    """RapidAPI headers for the host stored under the given setting name"""
+    settings = get_settings()
+    return {
+        'x-rapidapi-key': settings['rapidapi_key'],
+        'x-rapidapi-host': settings[host_setting]
+    }
@@ -0,0 +1,73 @@
+import threading
+import streamlit as st
+
+# How often (seconds) a waiting caller hears about the running job's progress
+WAIT_POLL = 0.5
+
+class SingleFlight:
+    """Runs at most one call per key at a time, sharing its result with concurrent callers
+
+    The first caller for a key runs the work on the calling thread; callers
+    that arrive while it is running block on an event until it finishes and
+    get the same result or exception. Keys are forgotten as soon as the call finishes, so this only
+    deduplicates work that is in progress.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    def run(self, key, fn, on_wait=None, poll=WAIT_POLL):
+        """Call fn() for key, or wait for the call already running for it
+
+        While waiting, on_wait(status, waiters) is called every `poll` seconds
+        with the latest status reported for the job.
+        """
+        while True:
+            with self.lock:
+                job = self.jobs.get(key)
+                leader = job is None
+                if leader:
+                    job = {'done': threading.Event(), 'status': None, 'waiters': 0}
+                    self.jobs[key] = job
+                else:
+                    job['waiters'] += 1
+
+            if leader:
+                try:
+                    job['result'] = fn()
+                except Exception as e:
+                    job['error'] = e
+                    raise
+                finally:
+                    # Anything else (e.g. Streamlit stopping the leader's script)
+                    # leaves neither result nor error, and waiters start over
+                    with self.lock:
+                        del self.jobs[key]
+                    job['done'].set()
+                return job['result']
+
+            while not job['done'].wait(poll):
+                if on_wait:
+                    on_wait(job['status'], job['waiters'])
+            if 'error' in job:
+                raise job['error']
+            if 'result' in job:
+                return job['result']
+
+    def report(self, key, status):
+        """Record the latest progress message for a running job"""
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None:
+                job['status'] = status
+
+    def running(self, key):
+        """Whether a call is in progress for key"""
+        with self.lock:
+            return key in self.jobs
+
+@st.cache_resource
+def get_video_jobs():
+    """Process-wide registry of videos being converted and transcribed"""
+    return SingleFlight()
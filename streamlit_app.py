@@ -1,29 +1,24 @@
 import streamlit as st
 import hmac
 import time
-import os
-from dotenv import load_dotenv
+from settings import get_settings, reload_settings
+from metrics import metrics_sidebar
+from profiling import profiles_panel, profiling_allowed, run_page
+from session_store import storage_sidebar
 
 def check_password():
     """Returns `True` if the user had the correct password."""
     
-    # Load credentials from environment variables if not in streamlit cloud
-    load_dotenv()
-    
     def password_entered():
         """Checks whether a password entered by the user is correct."""
-        try:
-            # Try to get credentials from Streamlit secrets first
-            username = st.secrets.credentials.username
-            password = st.secrets.credentials.password
-        except:
-            # Fall back to environment variables
-            username = os.getenv('ADMIN_USERNAME')
-            password = os.getenv('ADMIN_PASSWORD')
-            
-            if not username or not password:
-                st.error("Authentication credentials not properly configured")
-                return
+        # Credentials come from Streamlit secrets or environment variables
+        settings = get_settings()
+        username = settings['admin_username']
+        password = settings['admin_password']
+        
+        if not username or not password:
+            st.error("Authentication credentials not properly configured")
+            return
             
         if hmac.compare_digest(st.session_state["username"], username):
             if hmac.compare_digest(st.session_state["password"], password):
@@ -67,11 +62,30 @@ def main():
         del st.session_state["password_correct"]
         st.rerun()
     
+    # Pick up changed secrets, environment variables or config.py without a restart
+    if st.sidebar.button("Reload Configuration"):
+        reload_settings()
+        st.sidebar.success("Configuration reloaded")
+    
+    metrics_sidebar()
+    storage_sidebar()
+    
+    # Kept outside the widget's own key so the setting survives visits to other pages
+    st.session_state["profiling_enabled"] = profiling_allowed() and st.sidebar.toggle(
+        "Profile page runs",
+        value=st.session_state.get("profiling_enabled", False),
+        help="Record a cProfile profile of every page rerun in this session"
+    )
+    
     st.title("YouTube Tools 🎥")
     st.markdown("---")
 
     st.write("Welcome to YouTube Tools! Please select a tool from the sidebar.")
 
+    if st.session_state["profiling_enabled"]:
+        st.markdown("---")
+        profiles_panel()
+
     # Add footer
     st.markdown("---")
     st.markdown("""
@@ -81,4 +95,4 @@ def main():
     """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    run_page("home", main) 
\ No newline at end of file
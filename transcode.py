@@ -0,0 +1,69 @@
+import os
+import subprocess
+
+# Opus settings for the file uploaded to Groq. Whisper resamples everything
+# to 16 kHz mono, so higher rates only add upload size. A sample_rate of None
+# keeps ffmpeg's choice (48 kHz for Opus); threads 0 lets ffmpeg decide.
+TRANSCODE_PRESETS = {
+    'speech-12k': {
+        'label': "Speech, 12 kbps (default)",
+        'bitrate': '12k', 'sample_rate': None, 'channels': 1, 'application': 'voip', 'threads': 0
+    },
+    'speech-6k': {
+        'label': "Smallest upload, 6 kbps at 8 kHz",
+        'bitrate': '6k', 'sample_rate': 8000, 'channels': 1, 'application': 'voip', 'threads': 0
+    },
+    'speech-16k-16khz': {
+        'label': "Speech, 16 kbps at 16 kHz",
+        'bitrate': '16k', 'sample_rate': 16000, 'channels': 1, 'application': 'voip', 'threads': 0
+    },
+    'speech-12k-single-thread': {
+        'label': "Speech, 12 kbps, one ffmpeg thread per job",
+        'bitrate': '12k', 'sample_rate': None, 'channels': 1, 'application': 'voip', 'threads': 1
+    },
+    'music-32k': {
+        'label': "Music and mixed content, 32 kbps",
+        'bitrate': '32k', 'sample_rate': None, 'channels': 1, 'application': 'audio', 'threads': 0
+    }
+}
+DEFAULT_PRESET = 'speech-12k'
+
+def ffmpeg_command():
+    """Path to ffmpeg, preferring the system install"""
+    # Add full path for ffmpeg in Streamlit Cloud
+    if os.path.exists('/usr/bin/ffmpeg'):
+        return '/usr/bin/ffmpeg'
+    elif os.path.exists('/usr/local/bin/ffmpeg'):
+        return '/usr/local/bin/ffmpeg'
+    return 'ffmpeg'
+
+def profile_key(preset):
+    """Audio cache profile for a preset, built from every setting that changes the output
+
+    Thread count only affects speed, so presets differing only in threads share
+    cached files, and editing a preset's settings never reuses stale files.
+    """
+    settings = TRANSCODE_PRESETS[preset]
+    rate = settings['sample_rate'] or 'auto'
+    return f"opus-{settings['channels']}ch-{settings['bitrate']}-{rate}-{settings['application']}"
+
+def transcode_args(preset, source, target, ffmpeg_cmd=None):
+    """ffmpeg command line converting source to Opus with a preset"""
+    settings = TRANSCODE_PRESETS[preset]
+    args = [
+        ffmpeg_cmd or ffmpeg_command(), '-i', source,
+        '-threads', str(settings['threads']),
+        '-vn', '-map_metadata', '-1',
+        '-ac', str(settings['channels'])
+    ]
+    if settings['sample_rate']:
+        args += ['-ar', str(settings['sample_rate'])]
+    return args + [
+        '-c:a', 'libopus',
+        '-b:a', settings['bitrate'], '-application', settings['application'],
+        target
+    ]
+
+def transcode(source, target, preset=DEFAULT_PRESET, ffmpeg_cmd=None):
+    """Convert an audio file to Opus with a preset; raises CalledProcessError on failure"""
+    subprocess.run(transcode_args(preset, source, target, ffmpeg_cmd), check=True, capture_output=True)
@@ -0,0 +1,202 @@
+import os
+import re
+import sqlite3
+import zlib
+import threading
+from contextlib import contextmanager
+import numpy as np
+import streamlit as st
+from settings import get_settings, on_reload
+from ingestion import extract_video_id
+
+# MinHash / LSH parameters. With 32 bands of 4 rows, pairs above ~0.45 Jaccard
+# similarity are very likely to share a bucket; the final decision uses the
+# estimated similarity against DUPLICATE_THRESHOLD.
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+NUM_BANDS = 32
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+DUPLICATE_THRESHOLD = 0.8
+
+_PRIME = np.uint64((1 << 31) - 1)
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(1000003)
+_CHUNK_SIZE = 4096
+
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+
+def shingle_hashes(text, k=SHINGLE_SIZE):
+    """Hash word k-shingles of a transcript into unique 32-bit integers; empty below k words"""
+    tokens = re.findall(r'\w+', text.lower())
+    if len(tokens) < k:
+        return np.empty(0, dtype=np.uint64)
+
+    # Hash each distinct token once, then combine k consecutive token hashes
+    # with a rolling polynomial so the shingles are hashed without a Python loop
+    token_hashes = {}
+    codes = np.fromiter(
+        (token_hashes.setdefault(t, zlib.crc32(t.encode('utf-8'))) for t in tokens),
+        dtype=np.uint64,
+        count=len(tokens)
+    )
+    n = len(codes) - k + 1
+    shingles = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        shingles = ((shingles * _SHINGLE_BASE) + codes[j:j + n]) & _MASK32
+    return np.unique(shingles)
+
+def minhash_signature(text):
+    """Compute the MinHash signature of a transcript, or None if it is too short to compare
+
+    Without a single shingle every signature would be the same, so all short
+    transcripts would look like exact duplicates of each other.
+    """
+    hashes = shingle_hashes(text)
+    if len(hashes) == 0:
+        return None
+    signature = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), _CHUNK_SIZE):
+        chunk = hashes[start:start + _CHUNK_SIZE]
+        permuted = (_PERM_A[:, None] * chunk[None, :] + _PERM_B[:, None]) % _PRIME
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimate Jaccard similarity from two MinHash signatures"""
+    return float(np.mean(sig_a == sig_b))
+
+class TranscriptIndex:
+    """SQLite-backed LSH index of transcript signatures with sub-linear candidate lookup
+
+    Each signature is split into NUM_BANDS bands, and every band is indexed,
+    so a query only compares transcripts that share a band.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    video_key TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    signature BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS bands (
+                    band INTEGER NOT NULL,
+                    band_key BLOB NOT NULL,
+                    video_key TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_bands_key ON bands(band, band_key);
+                CREATE INDEX IF NOT EXISTS idx_bands_video ON bands(video_key);
+            """)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _band_keys(self, signature):
+        bands = signature.reshape(NUM_BANDS, ROWS_PER_BAND)
+        return [band.tobytes() for band in bands]
+
+    def add(self, key, signature, title=None):
+        """Add or replace a transcript signature, keeping its original position"""
+        blob = signature.astype(np.uint64).tobytes()
+        with self.lock, self._connect() as conn:
+            row = conn.execute("SELECT title, signature FROM transcripts WHERE video_key = ?", (key,)).fetchone()
+            if row == (title, blob):
+                return
+            if row is None:
+                conn.execute("INSERT INTO transcripts (video_key, title, signature) VALUES (?, ?, ?)", (key, title, blob))
+            else:
+                conn.execute("UPDATE transcripts SET title = ?, signature = ? WHERE video_key = ?", (title, blob, key))
+                conn.execute("DELETE FROM bands WHERE video_key = ?", (key,))
+            conn.executemany(
+                "INSERT INTO bands VALUES (?, ?, ?)",
+                [(band, band_key, key) for band, band_key in enumerate(self._band_keys(signature))]
+            )
+
+    def query(self, signature, threshold=DUPLICATE_THRESHOLD, exclude=None):
+        """Return (key, similarity) pairs above the threshold, best match first
+
+        When `exclude` is already indexed, only transcripts indexed before it
+        are considered, so the original of a duplicate pair is never flagged
+        on a later rerun.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT seq FROM transcripts WHERE video_key = ?", (exclude or '',)).fetchone()
+            cutoff = row[0] if row else None
+            conn.execute("CREATE TEMP TABLE probe (band INTEGER, band_key BLOB)")
+            conn.executemany("INSERT INTO probe VALUES (?, ?)", enumerate(self._band_keys(signature)))
+            rows = conn.execute("""
+                SELECT DISTINCT t.video_key, t.signature
+                FROM probe p
+                JOIN bands b ON b.band = p.band AND b.band_key = p.band_key
+                JOIN transcripts t ON t.video_key = b.video_key
+                WHERE t.video_key != ? AND (? IS NULL OR t.seq < ?)
+            """, (exclude or '', cutoff, cutoff)).fetchall()
+        matches = [
+            (key, estimate_similarity(signature, np.frombuffer(blob, dtype=np.uint64)))
+            for key, blob in rows
+        ]
+        matches = [m for m in matches if m[1] >= threshold]
+        return sorted(matches, key=lambda m: m[1], reverse=True)
+
+    def title(self, key):
+        """Stored title of a transcript, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT title FROM transcripts WHERE video_key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+
+@st.cache_resource
+def get_transcript_index():
+    """Process-wide index of every transcript seen so far"""
+    return TranscriptIndex(get_settings()['transcript_index_path'])
+
+on_reload(get_transcript_index.clear)
+
+def find_near_duplicates(index, transcripts, threshold=DUPLICATE_THRESHOLD):
+    """Flag transcripts in a batch that nearly duplicate an earlier or stored one
+
+    Transcripts are keyed by video ID, so the same video under a different
+    URL form is still one entry. Each transcript is checked against the
+    index (previous runs plus the transcripts before it in this batch) and
+    then added to it. Returns a list of dicts with the duplicate's url, the
+    key/title it matches, whether that match is part of this batch and the
+    estimated similarity.
+    """
+    keys = [extract_video_id(t['url']) or t['url'] for t in transcripts]
+    duplicates = []
+    for t, key in zip(transcripts, keys):
+        signature = minhash_signature(t['transcript'])
+        if signature is None:
+            continue
+        matches = index.query(signature, threshold=threshold, exclude=key)
+        if matches:
+            match_key, similarity = matches[0]
+            duplicates.append({
+                'url': t['url'],
+                'title': t['title'],
+                'duplicate_of': match_key,
+                'duplicate_of_title': index.title(match_key) or match_key,
+                'in_batch': match_key in keys,
+                'similarity': similarity
+            })
+        index.add(key, signature, title=t['title'])
+    return duplicates
@@ -1,15 +1,12 @@
 import streamlit as st
 import re
-import requests
 import time
 import os
 import subprocess
-from groq import Groq
-from dotenv import load_dotenv
+from settings import get_settings, get_http_session, get_groq_client, rapidapi_headers
 
 class YouTubeDownloader:
     def __init__(self):
-        load_dotenv()
         self.transcripts = []
 
     def extract_video_id(self, url):
@@ -27,26 +24,13 @@ class YouTubeDownloader:
 
     def check_conversion_status(self, video_id):
         """Check conversion status from API"""
-        try:
-            # Try to get API keys from Streamlit secrets first
-            headers = {
-                'x-rapidapi-key': st.secrets.api_credentials.rapidapi_key,
-                'x-rapidapi-host': st.secrets.api_credentials.rapidapi_host
-            }
-        except:
-            # Fall back to environment variables
-            headers = {
-                'x-rapidapi-key': os.getenv('RAPIDAPI_KEY'),
-                'x-rapidapi-host': os.getenv('RAPIDAPI_HOST')
-            }
+        url = f"{get_settings()['mp3_api_base_url']}/dl"
+        headers = rapidapi_headers('mp3_rapidapi_host')
         
         with st.spinner('Converting video...'):
             while True:
                 try:
-                    response = requests.get(
-                        f"https://youtube-mp36.p.rapidapi.com/dl?id={video_id}",
-                        headers=headers
-                    )
+                    response = get_http_session().get(url, params={'id': video_id}, headers=headers)
                     data = response.json()
                     
                     if data.get('status') == 'ok':
@@ -63,7 +47,7 @@ class YouTubeDownloader:
         try:
             with st.spinner('Downloading and processing audio...'):
                 # Download the MP3 file
-                response = requests.get(url)
+                response = get_http_session().get(url)
                 mp3_path = "audio_file.mp3"
                 ogg_path = "audio.ogg"
                 
@@ -80,14 +64,7 @@ class YouTubeDownloader:
                 ], check=True)
                 
                 # Transcribe using Groq
-                try:
-                    client = Groq(
-                        api_key=st.secrets.api_credentials.groq_api_key
-                    )
-                except:
-                    client = Groq(
-                        api_key=os.getenv('GROQ_API_KEY')
-                    )
+                client = get_groq_client()
                 
                 with open(ogg_path, "rb") as file:
                     transcription = client.audio.transcriptions.create(
@@ -1,28 +1,19 @@
 import streamlit as st
 import requests
 import json
-from PIL import Image
-from io import BytesIO
-from dotenv import load_dotenv
-import os
+from settings import get_settings, get_http_session
 
 def get_api_config():
     """Get API configuration with detailed error checking"""
-    load_dotenv()  # Load environment variables as fallback
+    settings = get_settings()
+    api_key = settings['rapidapi_key']
+    api_host = settings['yt_rapidapi_host']
     
     config_status = {
         'is_valid': True,
         'errors': []
     }
     
-    # Try to get API keys from Streamlit secrets first, then fall back to env vars
-    try:
-        api_key = st.secrets.api_credentials.rapidapi_key
-        api_host = st.secrets.api_credentials.yt_rapidapi_host
-    except:
-        api_key = os.getenv('RAPIDAPI_KEY')
-        api_host = os.getenv('YT_RAPIDAPI_HOST')
-    
     if not api_key:
         config_status['is_valid'] = False
         config_status['errors'].append("RapidAPI key not found in secrets or environment variables")
@@ -38,7 +29,7 @@ def get_api_config():
     }
 
 def search_youtube(query, country_code="US", language="en"):
-    url = "https://yt-api.p.rapidapi.com/search"
+    url = f"{get_settings()['yt_api_base_url']}/search"
     
     querystring = {
         "query": query,
@@ -69,7 +60,7 @@ def search_youtube(query, country_code="US", language="en"):
         st.write(f"API Host: {api_config['host']}")
         st.write(f"Query Parameters: {querystring}")
         
-        response = requests.get(url, headers=headers, params=querystring)
+        response = get_http_session().get(url, headers=headers, params=querystring)
         
         # Show response details
         st.write(f"Response Status Code: {response.status_code}")
@@ -172,9 +163,8 @@ def main():
                         if "thumbnail" in item:
                             thumbnail_url = item["thumbnail"][0]["url"]
                             try:
-                                response = requests.get(thumbnail_url)
-                                img = Image.open(BytesIO(response.content))
-                                st.image(img, width=160)
+                                response = get_http_session().get(thumbnail_url)
+                                st.image(response.content, width=160)
                             except Exception as e:
                                 if debug_mode:
                                     st.error(f"Thumbnail error: {str(e)}")